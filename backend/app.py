@@ -10,21 +10,62 @@ network security systems.
 
 from __future__ import annotations
 
-from typing import List
-
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Hashable, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+import orjson
 
 try:
-    from . import db, schemas, model
+    from . import cache, db, fast_schemas, schemas, model
 except ImportError:  # pragma: no cover - fallback for running from backend/
+    import cache  # type: ignore  # noqa: E402
     import db  # type: ignore  # noqa: E402
+    import fast_schemas  # type: ignore  # noqa: E402
     import schemas  # type: ignore  # noqa: E402
     import model  # type: ignore  # noqa: E402
 
-app = FastAPI(title="Physiological Threat Intelligence Engine", version="0.1.0")
+
+# Number of processes running the CPU-bound model code; defaults to one per core
+COMPUTE_WORKERS = int(os.environ.get("COMPUTE_WORKERS", os.cpu_count() or 1))
+
+_POOL: Optional[ProcessPoolExecutor] = None
+
+# Items encoded per chunk of a streamed JSON array
+STREAM_CHUNK = 512
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Open the database and compute pool on startup and close them on shutdown."""
+    global _POOL
+    # forkserver rather than fork: the server already runs threads (the
+    # aiosqlite worker among them) that must not be duplicated into children
+    _POOL = ProcessPoolExecutor(
+        max_workers=COMPUTE_WORKERS,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+    await db.init_db()
+    try:
+        yield
+    finally:
+        await db.close()
+        _POOL.shutdown(cancel_futures=True)
+        _POOL = None
+
+
+app = FastAPI(
+    title="Physiological Threat Intelligence Engine",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -35,86 +76,169 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-def startup_event() -> None:
-    """Initialise the database when the server starts."""
-    db.init_db()
+async def _cache_key(kind: str, user_id: str) -> Tuple[Hashable, int]:
+    """Return the result cache key for a user's data and their record count."""
+    n_rows, latest_date = await db.fetch_user_summary(user_id)
+    return (kind, user_id, db.user_version(user_id), latest_date, n_rows), n_rows
+
+
+def _json_response(body: bytes) -> Response:
+    """Wrap an already encoded JSON body, bypassing response validation."""
+    return Response(content=body, media_type="application/json")
+
+
+async def _run_compute(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a model function in the compute pool without blocking the event loop.
+
+    ``fn`` must be a top-level function of ``model`` taking picklable
+    arguments. Outside the lifespan (no pool) it runs on the default thread
+    pool instead.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_POOL, fn, *args)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Encode with orjson exactly as ``ORJSONResponse`` does."""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+async def _slices(items: List[Any]) -> AsyncIterator[List[Any]]:
+    """Yield ``items`` in slices of :data:`STREAM_CHUNK`."""
+    for start in range(0, len(items), STREAM_CHUNK):
+        yield items[start:start + STREAM_CHUNK]
+
+
+async def _stream_array(
+    batches: AsyncIterable[List[Any]], encode: Callable[[List[Any]], bytes]
+) -> AsyncIterator[bytes]:
+    """Yield a JSON array one encoded batch at a time.
+
+    ``encode`` turns a batch into a JSON array; its brackets are dropped so
+    consecutive batches join into a single array. Only one batch is encoded
+    at a time and the client receives the first one straight away.
+    """
+    yield b"["
+    sep = b""
+    async for batch in batches:
+        if batch:
+            yield sep + encode(batch)[1:-1]
+            sep = b","
+    yield b"]"
 
 
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
     """Health check endpoint."""
     return {"status": "ok"}
 
 
 @app.post("/records", response_model=schemas.HealthRecordOut)
-def create_or_update_record(rec: schemas.HealthRecordIn) -> schemas.HealthRecordOut:
+async def create_or_update_record(rec: schemas.HealthRecordIn) -> Response:
     """Insert or update a health record for a user."""
-    rec_id = db.upsert_record(rec.model_dump())
-    return schemas.HealthRecordOut(id=rec_id, **rec.model_dump())
+    payload = rec.model_dump()
+    rec_id = await db.upsert_record(payload)
+    # The input was validated on the way in; echo it back without a second pass
+    payload["id"] = rec_id
+    return ORJSONResponse(payload)
+
+
+@app.post("/records/bulk", response_model=schemas.BulkUpsertOut)
+async def create_records_bulk(recs: List[schemas.HealthRecordIn]) -> schemas.BulkUpsertOut:
+    """Insert or update a batch of health records in a single transaction."""
+    count = await db.upsert_records_bulk([r.model_dump() for r in recs])
+    return schemas.BulkUpsertOut(count=count)
 
 
+# The list routes below check and encode their payloads once with the
+# msgspec mirrors in fast_schemas, so the bytes can be streamed or cached,
+# and return them as a raw Response. Their ``response_model`` is never
+# applied and only documents the shape in the OpenAPI schema.
 @app.get("/records/{user_id}", response_model=list[schemas.HealthRecordOut])
-def list_records(user_id: str) -> list[schemas.HealthRecordOut]:
+async def list_records(user_id: str) -> Response:
     """Return all health records for a user sorted by date."""
-    rows = db.fetch_user_records(user_id)
-    return [schemas.HealthRecordOut(**r) for r in rows]
+    body = _stream_array(
+        db.iter_user_records(user_id, STREAM_CHUNK),
+        lambda batch: fast_schemas.encode(batch, List[fast_schemas.HealthRecordOut]),
+    )
+    return StreamingResponse(body, media_type="application/json")
 
 
 @app.get("/trust/{user_id}", response_model=schemas.TrustScoresOut)
-def get_trust_scores(user_id: str) -> schemas.TrustScoresOut:
+async def get_trust_scores(user_id: str) -> Response:
     """Compute trust scores for all records of a user."""
-    rows = db.fetch_user_records(user_id)
-    if not rows:
+    key, n_rows = await _cache_key("trust", user_id)
+    if not n_rows:
         raise HTTPException(status_code=404, detail="No data found for user")
-    df = pd.DataFrame(rows)
-    df_sorted = df.sort_values("date")
-    _, trust_entries = model.compute_trust_scores(df_sorted)
-    return schemas.TrustScoresOut(user_id=user_id, scores=[schemas.TrustScore(**t) for t in trust_entries])
+    body = cache.get(key)
+    if body is None:
+        dates, values = await db.fetch_user_metric_matrix(user_id)
+        trust_entries = await _run_compute(model.compute_trust_scores_from_arr, values, dates, user_id)
+        body = fast_schemas.encode({"user_id": user_id, "scores": trust_entries}, fast_schemas.TrustScoresOut)
+        cache.put(key, body)
+    return _json_response(body)
 
 
 @app.get("/anomaly/{user_id}", response_model=schemas.AnomalyListOut)
-def get_anomalies(user_id: str) -> schemas.AnomalyListOut:
+async def get_anomalies(user_id: str) -> Response:
     """Compute anomaly scores for all days of a user."""
-    rows = db.fetch_user_records(user_id)
-    if len(rows) < 5:
+    key, n_rows = await _cache_key("anomaly", user_id)
+    if n_rows < 5:
         raise HTTPException(status_code=400, detail="Insufficient data for anomaly detection (need at least 5 records)")
-    df = pd.DataFrame(rows).sort_values("date")
-    results = model.compute_anomalies(df)
-    return schemas.AnomalyListOut(user_id=user_id, results=[schemas.AnomalyOut(**r) for r in results])
+    body = cache.get(key)
+    if body is None:
+        dates, values = await db.fetch_user_metric_matrix(user_id)
+        results = await _run_compute(model.compute_anomalies_from_arr, values, dates, user_id)
+        body = fast_schemas.encode({"user_id": user_id, "results": results}, fast_schemas.AnomalyListOut)
+        cache.put(key, body)
+    return _json_response(body)
 
 
 @app.get("/correlations/{user_id}", response_model=schemas.CorrelationMatrixOut)
-def get_correlations(user_id: str) -> schemas.CorrelationMatrixOut:
+async def get_correlations(user_id: str) -> Response:
     """Compute pairwise correlations between metrics for a user."""
-    rows = db.fetch_user_records(user_id)
-    if len(rows) < 3:
+    key, n_rows = await _cache_key("correlations", user_id)
+    if n_rows < 3:
         raise HTTPException(status_code=400, detail="Insufficient data to compute correlations (need at least 3 records)")
-    df = pd.DataFrame(rows).sort_values("date")
-    corrs = model.compute_correlations(df)
-    return schemas.CorrelationMatrixOut(user_id=user_id, correlations=[schemas.CorrelationEntry(**c) for c in corrs])
+    body = cache.get(key)
+    if body is None:
+        dates, values = await db.fetch_user_metric_matrix(user_id)
+        corrs = await _run_compute(model.compute_correlations_from_arr, values, dates, user_id)
+        body = fast_schemas.encode({"user_id": user_id, "correlations": corrs}, fast_schemas.CorrelationMatrixOut)
+        cache.put(key, body)
+    return _json_response(body)
 
 
 @app.post("/simulate", response_model=schemas.SimulationResult)
-def simulate(request: schemas.SimulationRequest) -> schemas.SimulationResult:
+async def simulate(request: schemas.SimulationRequest) -> Response:
     """Simulate adversarial tampering on a user's data and return detection results."""
-    rows = db.fetch_user_records(request.user_id)
+    rows = await db.fetch_user_records(request.user_id)
     if len(rows) < 5:
         raise HTTPException(status_code=400, detail="Insufficient data to perform simulation")
-    df = pd.DataFrame(rows).sort_values("date")
-    # Apply perturbation
-    tampered = model.simulate_attack(df, mode=request.mode, fraction=request.fraction)
-    # Detect anomalies on tampered data
-    results = model.compute_anomalies(tampered)
-    # Convert tampered df back to list of dicts
-    tampered_records: List[dict] = tampered.to_dict(orient="records")
-    return schemas.SimulationResult(
-        user_id=request.user_id,
-        mode=request.mode,
-        modified_records=[schemas.HealthRecordOut(**r) for r in tampered_records],
-        detected_anomalies=[schemas.AnomalyOut(**r) for r in results],
+    # Apply perturbation and detect anomalies on the tampered data
+    tampered_records, results = await _run_compute(
+        model.simulate_from_records, rows, request.mode, request.fraction
     )
 
+    async def body() -> AsyncIterator[bytes]:
+        # Both lists are checked against the msgspec mirrors of
+        # SimulationResult's item models as they are encoded
+        yield b'{"user_id":' + _dumps(request.user_id) + b',"mode":' + _dumps(request.mode)
+        yield b',"modified_records":'
+        async for chunk in _stream_array(
+            _slices(tampered_records),
+            lambda batch: fast_schemas.encode(batch, List[fast_schemas.HealthRecordOut]),
+        ):
+            yield chunk
+        yield b',"detected_anomalies":'
+        async for chunk in _stream_array(
+            _slices(results), lambda batch: fast_schemas.encode(batch, List[fast_schemas.AnomalyOut])
+        ):
+            yield chunk
+        yield b"}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
 
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception) -> JSONResponse:
@@ -0,0 +1,47 @@
+"""
+In‑process result cache for the Physiological Threat Intelligence Engine.
+
+Trust scores, anomalies and correlations are pure functions of a user's
+stored records, which only change when a record is upserted. Endpoints cache
+their encoded responses under a key made of the user's write version (bumped
+by ``db.upsert_record``), the latest record date and the row count, so a
+dashboard polling the same user is served without recomputation. Entries
+are evicted least‑recently‑used once ``MAXSIZE`` is reached and expire after
+``TTL_SECONDS`` so writes made by another process are picked up.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+MAXSIZE = 1024
+TTL_SECONDS = 30.0
+
+_ENTRIES: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+
+def get(key: Hashable) -> Optional[Any]:
+    """Return the cached value for ``key`` or None if absent or expired."""
+    entry = _ENTRIES.get(key)
+    if entry is None:
+        return None
+    expires, value = entry
+    if expires < time.monotonic():
+        del _ENTRIES[key]
+        return None
+    _ENTRIES.move_to_end(key)
+    return value
+
+
+def put(key: Hashable, value: Any) -> None:
+    """Store ``value`` under ``key``, evicting the oldest entry when full."""
+    _ENTRIES[key] = (time.monotonic() + TTL_SECONDS, value)
+    _ENTRIES.move_to_end(key)
+    while len(_ENTRIES) > MAXSIZE:
+        _ENTRIES.popitem(last=False)
+
+
+def clear() -> None:
+    """Drop every cached entry."""
+    _ENTRIES.clear()
@@ -0,0 +1,102 @@
+"""Numba kernel for the rolling median and MAD baseline.
+
+The kernel walks each metric column once, keeping the current window in an
+insertion‑sorted buffer: every step drops the value that left the window
+and inserts the new one, so the median is read directly from the buffer
+and the MAD is found by merging deviations outward from the median. The
+columns are independent and are processed in parallel with ``prange``.
+
+Importing this module requires numba; :mod:`normalization` falls back to
+its NumPy implementation when the import fails.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def _insert(buf: np.ndarray, count: int, value: float) -> None:
+    """Insert ``value`` into the sorted prefix ``buf[:count]``."""
+    i = count
+    while i > 0 and buf[i - 1] > value:
+        buf[i] = buf[i - 1]
+        i -= 1
+    buf[i] = value
+
+
+@njit(cache=True)
+def _remove(buf: np.ndarray, count: int, value: float) -> None:
+    """Remove one occurrence of ``value`` from the sorted prefix ``buf[:count]``."""
+    i = 0
+    while buf[i] != value:
+        i += 1
+    while i < count - 1:
+        buf[i] = buf[i + 1]
+        i += 1
+
+
+@njit(cache=True)
+def _sorted_mad(buf: np.ndarray, count: int, median: float) -> float:
+    """Median absolute deviation of the sorted prefix ``buf[:count]``.
+
+    Deviations grow monotonically on either side of the median, so the k‑th
+    smallest deviation is found by a two‑pointer merge without sorting.
+    """
+    right = 0
+    while right < count and buf[right] < median:
+        right += 1
+    left = right - 1
+    lo_rank = (count - 1) // 2
+    lo = 0.0
+    dev = 0.0
+    for rank in range(count // 2 + 1):
+        if left < 0 or (right < count and buf[right] - median < median - buf[left]):
+            dev = buf[right] - median
+            right += 1
+        else:
+            dev = median - buf[left]
+            left -= 1
+        if rank == lo_rank:
+            lo = dev
+    return 0.5 * (lo + dev)
+
+
+@njit(parallel=True, cache=True)
+def rolling_median_mad(x: np.ndarray, w: int, min_p: int, out_med: np.ndarray, out_mad: np.ndarray) -> None:
+    """Fill ``out_med``/``out_mad`` with the baseline of the ``w`` preceding rows.
+
+    ``x`` is a ``(n_days, n_metrics)`` float array. Row ``t`` of the outputs
+    summarises rows ``t-w .. t-1`` of ``x`` (so the baseline is already
+    shifted by one day). NaNs are ignored; rows whose window holds fewer
+    than ``min_p`` values are NaN. The MAD is floored at ``1e-6``.
+    """
+    n, k = x.shape
+    for j in prange(k):
+        buf = np.empty(w)
+        count = 0
+        for t in range(n):
+            if count >= min_p:
+                med = 0.5 * (buf[(count - 1) // 2] + buf[count // 2])
+                out_med[t, j] = med
+                out_mad[t, j] = max(_sorted_mad(buf, count, med), 1e-6)
+            else:
+                out_med[t, j] = np.nan
+                out_mad[t, j] = np.nan
+            if t >= w:
+                old = x[t - w, j]
+                if not np.isnan(old):
+                    _remove(buf, count, old)
+                    count -= 1
+            value = x[t, j]
+            if not np.isnan(value):
+                _insert(buf, count, value)
+                count += 1
+
+
+# Compile (or load from the on-disk cache) at import so the first request
+# does not pay the JIT cost.
+_warm = np.zeros((2, 1))
+rolling_median_mad(_warm, 1, 1, np.empty_like(_warm), np.empty_like(_warm))
+del _warm
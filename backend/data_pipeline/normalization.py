@@ -8,14 +8,23 @@ different model components. A rolling baseline is built via a median and
 MAD computed on a sliding window; the baseline is shifted by one day to
 avoid peeking into the future. The MAD function includes a small epsilon
 to avoid divide‑by‑zero errors when the data has little variation.
+
+When numba is installed the rolling statistics come from the JIT kernel in
+``_rolling_numba``; otherwise they are computed with strided NumPy windows.
 """
 
 from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from typing import Optional, Sequence, Tuple
 
-from typing import Optional
+try:
+    from ._rolling_numba import rolling_median_mad
+except ImportError:  # numba is optional; fall back to strided NumPy windows
+    rolling_median_mad = None
 
 def _mad(series: pd.Series) -> float:
     """Compute the median absolute deviation of a Pandas Series.
@@ -30,7 +39,59 @@ def _mad(series: pd.Series) -> float:
     return float(mad if mad > 1e-6 else 1e-6)
 
 
-def build_robust_baseline(df: pd.DataFrame, window: int = 14) -> pd.DataFrame:
+def _column_mads(values: np.ndarray) -> np.ndarray:
+    """Median absolute deviation of each column of a 2‑D float array.
+
+    Equivalent to applying :func:`_mad` to every column with its NaNs
+    dropped, using one NaN mask instead of a pandas pass per column.
+    Columns without any values get the ``1e-6`` floor.
+    """
+    mads = np.full(values.shape[1], 1e-6)
+    observed = ~np.isnan(values).all(axis=0)
+    if observed.any():
+        cols = values[:, observed]
+        median = np.nanmedian(cols, axis=0)
+        mad = np.nanmedian(np.abs(cols - median), axis=0)
+        mads[observed] = np.where(mad > 1e-6, mad, 1e-6)
+    return mads
+
+
+def _window_median(windows: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Median along the last axis of ``windows``, ignoring NaNs.
+
+    ``counts`` holds the number of non‑NaN values in each window. NaNs sort
+    to the end, so the median is read from the first ``counts`` sorted
+    entries. Windows with no valid values produce garbage and must be masked
+    by the caller.
+    """
+    ordered = np.sort(windows, axis=-1)
+    lo = np.take_along_axis(ordered, ((counts - 1) // 2)[..., None], axis=-1)[..., 0]
+    hi = np.take_along_axis(ordered, (counts // 2)[..., None], axis=-1)[..., 0]
+    return (lo + hi) / 2.0
+
+
+def _lagged_median_mad(values: np.ndarray, window: int, min_periods: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling median and MAD over the ``window`` rows preceding each row.
+
+    ``values`` is a ``(n_days, n_metrics)`` float array. Every window is
+    materialised as a strided view, so the median and the MAD of all windows
+    are computed with two sorts instead of one Python callback per window.
+    Rows whose window holds fewer than ``min_periods`` valid values are NaN.
+    """
+    n_metrics = values.shape[1]
+    # Prepend a full window of NaNs so window t covers rows t-window .. t-1
+    padded = np.concatenate([np.full((window, n_metrics), np.nan), values])
+    windows = sliding_window_view(padded, window, axis=0)[: len(values)]
+    counts = np.count_nonzero(~np.isnan(windows), axis=-1)
+    median = _window_median(windows, counts)
+    mad = _window_median(np.abs(windows - median[..., None]), counts)
+    valid = counts >= min_periods
+    return np.where(valid, median, np.nan), np.where(valid, np.maximum(mad, 1e-6), np.nan)
+
+
+def build_robust_baseline(
+    df: pd.DataFrame, window: int = 14, metrics: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
     """Attach rolling median and MAD baselines to a DataFrame.
 
     For each metric column in the input DataFrame, this function computes a
@@ -48,6 +109,9 @@ def build_robust_baseline(df: pd.DataFrame, window: int = 14) -> pd.DataFrame:
         the date column and at least one metric.
     window:
         Size of the rolling window in days. Defaults to 14.
+    metrics:
+        Optional list of metric columns to baseline. If None, every column
+        other than ``date`` and ``user_id`` is treated as a metric.
 
     Returns
     -------
@@ -57,21 +121,18 @@ def build_robust_baseline(df: pd.DataFrame, window: int = 14) -> pd.DataFrame:
         ``{metric}_median`` and ``{metric}_mad``.
     """
     out = df.copy()
-    # Determine which columns are metrics: numeric and not the date or user_id
-    metric_cols = [col for col in df.columns if col not in {"date", "user_id"}]
-    for m in metric_cols:
-        # Rolling median
-        out[f"{m}_median"] = (
-            out[m]
-            .rolling(window=window, min_periods=max(5, window // 2))
-            .median()
-            .shift(1)
-        )
-        # Rolling MAD using the helper; note the shift
-        out[f"{m}_mad"] = (
-            out[m]
-            .rolling(window=window, min_periods=max(5, window // 2))
-            .apply(_mad, raw=False)
-            .shift(1)
-        )
-    return out
\ No newline at end of file
+    if metrics is None:
+        # Determine which columns are metrics: numeric and not the date or user_id
+        metrics = [col for col in df.columns if col not in {"date", "user_id"}]
+    values = np.ascontiguousarray(df[list(metrics)].to_numpy(dtype=np.float64))
+    min_periods = max(5, window // 2)
+    if rolling_median_mad is not None:
+        median = np.empty_like(values)
+        mad = np.empty_like(values)
+        rolling_median_mad(values, window, min_periods, median, mad)
+    else:
+        median, mad = _lagged_median_mad(values, window, min_periods)
+    for j, m in enumerate(metrics):
+        out[f"{m}_median"] = median[:, j]
+        out[f"{m}_mad"] = mad[:, j]
+    return out
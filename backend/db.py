@@ -2,29 +2,82 @@
 SQLite helper functions for the Physiological Threat Intelligence Engine.
 
 This module encapsulates basic operations against the database used to store
-health records. It uses Python's built‑in sqlite3 module and sets a row
-factory so that rows behave like dictionaries.
+health records. It uses the ``aiosqlite`` driver so that queries can be
+awaited from the FastAPI event loop. Rows are fetched as plain tuples;
+functions that return records build dictionaries from :data:`COLUMNS`
+themselves. A single long‑lived connection is shared by all
+requests; it is opened and closed by the application's lifespan handler.
+The database runs in WAL mode so readers are not blocked by a writer.
 """
 
-import sqlite3
-from typing import Any, Dict, List, Optional
+import asyncio
+from collections import defaultdict
+from typing import Any, AsyncIterator, DefaultDict, Dict, List, Optional, Tuple
+
+import aiosqlite
+import numpy as np
 
 
 DB_PATH = "health_threat_engine.sqlite3"
 
+# Numeric columns returned by fetch_user_metric_matrix, in matrix column order
+METRIC_COLUMNS = ("sleep_hours", "resting_hr", "hrv", "steps", "calories", "weight")
+
+# Columns selected for full records, in the order of the returned dict keys
+COLUMNS = ("id", "user_id", "date") + METRIC_COLUMNS
+_SELECT_COLUMNS = ", ".join(COLUMNS)
+
+# Per-connection tuning applied whenever the shared connection is opened.
+# WAL with synchronous=NORMAL only fsyncs at checkpoints rather than on every
+# commit; mmap lets SQLite read pages without copying them into its own cache.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA mmap_size=268435456;",
+)
+
+_CONN: Optional[aiosqlite.Connection] = None
+_CONN_LOCK = asyncio.Lock()
+# Serialises transactions on the shared connection so that one coroutine's
+# commit cannot flush another's half-finished batch
+_WRITE_LOCK = asyncio.Lock()
+
+# Incremented on every write so cached results for a user can be invalidated
+_user_version: DefaultDict[str, int] = defaultdict(int)
+
 
-def connect() -> sqlite3.Connection:
-    """Create a new SQLite connection with row dictionary access."""
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
+async def connect() -> aiosqlite.Connection:
+    """Return the shared SQLite connection, opening it on first use."""
+    global _CONN
+    if _CONN is not None:
+        return _CONN
+    async with _CONN_LOCK:
+        if _CONN is None:
+            conn = await aiosqlite.connect(DB_PATH)
+            for pragma in PRAGMAS:
+                await conn.execute(pragma)
+            _CONN = conn
+    return _CONN
 
 
-def init_db() -> None:
+async def close() -> None:
+    """Close the shared SQLite connection if it is open."""
+    global _CONN
+    if _CONN is not None:
+        await _CONN.close()
+        _CONN = None
+
+
+def user_version(user_id: str) -> int:
+    """Return the number of writes made to a user's records by this process."""
+    return _user_version[user_id]
+
+
+async def init_db() -> None:
     """Initialise the database schema if it does not already exist."""
-    conn = connect()
-    cur = conn.cursor()
-    cur.execute(
+    conn = await connect()
+    await conn.execute(
         """
         CREATE TABLE IF NOT EXISTS health_records (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -40,82 +93,163 @@ def init_db() -> None:
         );
         """
     )
-    conn.commit()
-    conn.close()
+    await conn.commit()
+
+
+_UPSERT_SQL = """
+    INSERT INTO health_records (user_id, date, sleep_hours, resting_hr, hrv, steps, calories, weight)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, date) DO UPDATE SET
+        sleep_hours=excluded.sleep_hours,
+        resting_hr=excluded.resting_hr,
+        hrv=excluded.hrv,
+        steps=excluded.steps,
+        calories=excluded.calories,
+        weight=excluded.weight
+"""
+
+
+def _record_params(rec: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Return the positional parameters of ``_UPSERT_SQL`` for a record."""
+    return (
+        rec["user_id"],
+        rec["date"],
+        rec.get("sleep_hours"),
+        rec.get("resting_hr"),
+        rec.get("hrv"),
+        rec.get("steps"),
+        rec.get("calories"),
+        rec.get("weight"),
+    )
 
 
-def upsert_record(rec: Dict[str, Any]) -> int:
+async def upsert_record(rec: Dict[str, Any]) -> int:
     """Insert or update a health record and return its primary key.
 
     If a record for the same user_id and date already exists, it will be
     updated with the new values. Missing fields in the input will set the
     corresponding column to NULL.
     """
-    conn = connect()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO health_records (user_id, date, sleep_hours, resting_hr, hrv, steps, calories, weight)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(user_id, date) DO UPDATE SET
-            sleep_hours=excluded.sleep_hours,
-            resting_hr=excluded.resting_hr,
-            hrv=excluded.hrv,
-            steps=excluded.steps,
-            calories=excluded.calories,
-            weight=excluded.weight;
-        """,
-        (
-            rec["user_id"],
-            rec["date"],
-            rec.get("sleep_hours"),
-            rec.get("resting_hr"),
-            rec.get("hrv"),
-            rec.get("steps"),
-            rec.get("calories"),
-            rec.get("weight"),
-        ),
-    )
-    conn.commit()
-    # Retrieve the id for the inserted/updated record
-    cur.execute(
-        "SELECT id FROM health_records WHERE user_id=? AND date=?",
-        (rec["user_id"], rec["date"]),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return int(row["id"])
+    conn = await connect()
+    async with _WRITE_LOCK:
+        # RETURNING yields the id for both the insert and the update branch
+        async with conn.execute(_UPSERT_SQL + " RETURNING id;", _record_params(rec)) as cur:
+            row = await cur.fetchone()
+        await conn.commit()
+    _user_version[rec["user_id"]] += 1
+    return int(row[0])
+
+
+async def upsert_records_bulk(recs: List[Dict[str, Any]]) -> int:
+    """Insert or update many health records in one transaction.
+
+    Records follow the same upsert semantics as :func:`upsert_record`. The
+    whole batch is committed at once, so SQLite syncs the journal once per
+    batch instead of once per row; if any row fails nothing is written.
+    Returns the number of records processed.
+    """
+    if not recs:
+        return 0
+    conn = await connect()
+    async with _WRITE_LOCK:
+        await conn.execute("BEGIN")
+        try:
+            await conn.executemany(_UPSERT_SQL, [_record_params(r) for r in recs])
+            # Inside the try so a failed commit (e.g. SQLITE_BUSY) also rolls
+            # back instead of leaving the shared connection mid-transaction
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+    for user_id in {r["user_id"] for r in recs}:
+        _user_version[user_id] += 1
+    return len(recs)
 
 
-def fetch_user_records(user_id: str) -> List[Dict[str, Any]]:
+async def fetch_user_records(user_id: str) -> List[Dict[str, Any]]:
     """Return all health records for a user ordered by date."""
-    conn = connect()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT * FROM health_records
+    conn = await connect()
+    async with conn.execute(
+        f"""
+        SELECT {_SELECT_COLUMNS} FROM health_records
         WHERE user_id=?
         ORDER BY date ASC;
         """,
         (user_id,),
-    )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
+    ) as cur:
+        rows = [dict(zip(COLUMNS, r)) for r in await cur.fetchall()]
     return rows
 
 
-def fetch_record(user_id: str, date: str) -> Optional[Dict[str, Any]]:
+async def iter_user_records(user_id: str, batch_size: int = 1024) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield a user's records ordered by date in batches of ``batch_size``.
+
+    Unlike :func:`fetch_user_records` only one batch is held in memory at a
+    time, which lets large histories be streamed to the client.
+    """
+    conn = await connect()
+    async with conn.execute(
+        f"""
+        SELECT {_SELECT_COLUMNS} FROM health_records
+        WHERE user_id=?
+        ORDER BY date ASC;
+        """,
+        (user_id,),
+    ) as cur:
+        cur.arraysize = batch_size
+        while batch := await cur.fetchmany():
+            yield [dict(zip(COLUMNS, r)) for r in batch]
+
+
+async def fetch_user_metric_matrix(user_id: str) -> Tuple[List[str], np.ndarray]:
+    """Return a user's record dates and their metrics as a float matrix.
+
+    Only the date and :data:`METRIC_COLUMNS` are selected. Rows are read as
+    plain tuples in batches and packed straight into a ``(n_days,
+    n_metrics)`` float64 array ordered by date, with NULLs as NaN, so the
+    numeric endpoints never build a dictionary per row.
+    """
+    conn = await connect()
+    dates: List[str] = []
+    blocks: List[np.ndarray] = []
+    async with conn.execute(
+        f"""
+        SELECT date, {", ".join(METRIC_COLUMNS)} FROM health_records
+        WHERE user_id=?
+        ORDER BY date ASC;
+        """,
+        (user_id,),
+    ) as cur:
+        cur.arraysize = 1024
+        while batch := await cur.fetchmany():
+            dates.extend(r[0] for r in batch)
+            blocks.append(np.array([r[1:] for r in batch], dtype=np.float64))
+    if not blocks:
+        return dates, np.empty((0, len(METRIC_COLUMNS)), dtype=np.float64)
+    return dates, np.concatenate(blocks)
+
+
+async def fetch_user_summary(user_id: str) -> Tuple[int, Optional[str]]:
+    """Return the number of records for a user and the latest record date."""
+    conn = await connect()
+    async with conn.execute(
+        "SELECT COUNT(*), MAX(date) FROM health_records WHERE user_id=?;",
+        (user_id,),
+    ) as cur:
+        n_rows, latest_date = await cur.fetchone()
+    return int(n_rows), latest_date
+
+
+async def fetch_record(user_id: str, date: str) -> Optional[Dict[str, Any]]:
     """Return a single health record for a user on a given date."""
-    conn = connect()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT * FROM health_records
+    conn = await connect()
+    async with conn.execute(
+        f"""
+        SELECT {_SELECT_COLUMNS} FROM health_records
         WHERE user_id=? AND date=?
         LIMIT 1;
         """,
         (user_id, date),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    ) as cur:
+        row = await cur.fetchone()
+    return dict(zip(COLUMNS, row)) if row else None
@@ -0,0 +1,99 @@
+"""
+msgspec mirrors of the list‑heavy response schemas.
+
+The Pydantic models in ``schemas`` remain the source of truth for request
+validation and the OpenAPI documentation. The structs here mirror the
+response models returned by the list endpoints so that those payloads can
+be type‑checked and encoded to JSON in C: :func:`encode` converts the model
+layer's plain dictionaries into slotted structs and serialises them in one
+pass, roughly ten times faster than building the Pydantic models per row.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List, Optional
+
+import msgspec
+
+
+class HealthRecordOut(msgspec.Struct, kw_only=True):
+    """Mirror of :class:`schemas.HealthRecordOut`."""
+
+    user_id: str
+    date: str
+    sleep_hours: Optional[float] = None
+    resting_hr: Optional[float] = None
+    hrv: Optional[float] = None
+    steps: Optional[int] = None
+    calories: Optional[float] = None
+    weight: Optional[float] = None
+    id: int
+
+
+class TrustScore(msgspec.Struct):
+    """Mirror of :class:`schemas.TrustScore`."""
+
+    metric: str
+    date: str
+    score: float
+    drivers: List[str]
+
+
+class TrustScoresOut(msgspec.Struct):
+    """Mirror of :class:`schemas.TrustScoresOut`."""
+
+    user_id: str
+    scores: List[TrustScore]
+
+
+class AnomalyDriver(msgspec.Struct):
+    """Mirror of :class:`schemas.AnomalyDriver`."""
+
+    metric: str
+    value: Optional[float]
+    z_score: float
+    direction: str
+
+
+class AnomalyOut(msgspec.Struct):
+    """Mirror of :class:`schemas.AnomalyOut`."""
+
+    user_id: str
+    date: str
+    anomaly_score: float
+    is_anomaly: bool
+    drivers: List[AnomalyDriver]
+    narrative: str
+
+
+class AnomalyListOut(msgspec.Struct):
+    """Mirror of :class:`schemas.AnomalyListOut`."""
+
+    user_id: str
+    results: List[AnomalyOut]
+
+
+class CorrelationEntry(msgspec.Struct):
+    """Mirror of :class:`schemas.CorrelationEntry`."""
+
+    metric_x: str
+    metric_y: str
+    correlation: float
+
+
+class CorrelationMatrixOut(msgspec.Struct):
+    """Mirror of :class:`schemas.CorrelationMatrixOut`."""
+
+    user_id: str
+    correlations: List[CorrelationEntry]
+
+
+_ENCODER = msgspec.json.Encoder()
+
+
+def encode(payload: Any, schema: Any) -> bytes:
+    """Check ``payload`` against the struct type ``schema`` and encode it as JSON.
+
+    Raises :class:`msgspec.ValidationError` if the payload does not match.
+    """
+    return _ENCODER.encode(msgspec.convert(payload, schema))
@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for running the API with several Uvicorn workers.
+
+Usage (from ``backend/``)::
+
+    gunicorn app:app -c gunicorn_conf.py
+
+Each worker is a separate process with its own event loop (uvloop and
+httptools when installed), SQLite connection, result cache and compute
+pool, so throughput of the CPU‑bound endpoints scales with the number of
+cores.
+
+The result caches are not shared. A write only bumps the write version in
+the worker that handled it, so another worker may keep serving trust,
+anomaly and correlation results computed before the write until they
+expire after ``cache.TTL_SECONDS``, unless the write changed the user's
+row count or latest date. Staleness is therefore bounded by the TTL, which
+is the price of keeping the cache in process; run a single worker if
+reads must always reflect the latest write.
+"""
+
+import os
+
+bind = os.environ.get("BIND", "127.0.0.1:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+keepalive = 5
+
+# Heartbeat files in RAM so a slow disk cannot make workers look hung
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# Importing the app opens no database connection or process pool (both are
+# created per worker by the lifespan handler), so it is safe to load once in
+# the master and fork the workers from it.
+preload_app = True
+
+# Every worker already uses a core, so give each a single compute process
+# rather than one per core (which would start workers x cores processes)
+os.environ.setdefault("COMPUTE_WORKERS", "1")
@@ -9,29 +9,105 @@ from __future__ import annotations
 from typing import Dict, List, Tuple
 import numpy as np
 import pandas as pd
-import random
+
+try:
+    from .data_pipeline.normalization import build_robust_baseline as _build_robust_baseline, _column_mads
+except ImportError:  # pragma: no cover - fallback for running from backend/
+    from data_pipeline.normalization import build_robust_baseline as _build_robust_baseline, _column_mads  # type: ignore  # noqa: E402
+
 METRICS = ["sleep_hours", "resting_hr", "hrv", "steps", "calories", "weight"]
 
+# Metrics stored as SQLite INTEGER and typed ``int`` in the API schemas
+INTEGER_METRICS = ["steps"]
+
+# Trust drivers indexed by ``(dist < 0.6) + 2 * (res < 0.6)``, or 4 if missing
+_TRUST_DRIVERS = (
+    (),
+    ("distribution shift",),
+    ("cross‑signal deviation",),
+    ("distribution shift", "cross‑signal deviation"),
+    ("missing",),
+)
 
-def _mad(series: pd.Series) -> float:
-    """Compute the median absolute deviation with a small epsilon to avoid zero."""
-    median = series.median()
-    mad = np.median(np.abs(series - median))
-    return float(mad if mad > 1e-6 else 1e-6)
+# Condition number above which the correlation matrix is treated as singular
+_MAX_COND = 1e8
 
 
 def build_robust_baseline(df: pd.DataFrame, window: int = 14) -> pd.DataFrame:
-    """Attach rolling median and MAD baselines to a DataFrame.
+    """Attach rolling median and MAD baselines for each of :data:`METRICS`.
+
+    Delegates to :func:`data_pipeline.normalization.build_robust_baseline` so
+    the API and the model classes share a single baseline implementation.
+    """
+    return _build_robust_baseline(df, window=window, metrics=METRICS)
+
+
+def metric_frame(user_id: str, dates: List[str], values: np.ndarray) -> pd.DataFrame:
+    """Build the model input DataFrame from a ``(n_days, n_metrics)`` matrix.
+
+    ``values`` must hold :data:`METRICS` in order, as returned by
+    ``db.fetch_user_metric_matrix``. The metrics become a single float block
+    without any per‑row type inference.
+    """
+    df = pd.DataFrame(values, columns=METRICS)
+    df.insert(0, "date", dates)
+    df.insert(0, "user_id", user_id)
+    return df
 
-    For each metric, compute a rolling median and MAD over a preceding window
-    of days. The baseline is shifted so that the current day's value is
-    compared only to past data, avoiding look‑ahead bias.
+
+def _metric_matrix(df: pd.DataFrame, suffix: str = "") -> np.ndarray:
+    """Return the ``(n_days, n_metrics)`` float64 matrix of :data:`METRICS`.
+
+    ``suffix`` selects derived columns instead, e.g. ``"_median"`` for the
+    baseline. The matrix is column‑major so each metric is one contiguous
+    run of memory, which keeps the per‑metric reductions unit‑stride.
     """
-    out = df.copy()
-    for m in METRICS:
-        out[f"{m}_median"] = out[m].rolling(window=window, min_periods=max(5, window // 2)).median().shift(1)
-        out[f"{m}_mad"] = out[m].rolling(window=window, min_periods=max(5, window // 2)).apply(_mad).shift(1)
-    return out
+    cols = [f"{m}{suffix}" for m in METRICS] if suffix else METRICS
+    return np.asfortranarray(df[cols].to_numpy(dtype=np.float64, copy=False))
+
+
+def _correlation_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Pearson correlation matrix of :data:`METRICS` as a NumPy array.
+
+    Complete data goes straight to ``np.corrcoef`` on the contiguous
+    ``(n_metrics, n_days)`` array. With missing values pandas' pairwise
+    complete‑case correlation is used so each pair keeps every day on which
+    both metrics were observed.
+    """
+    arr = _metric_matrix(df).T
+    if np.isnan(arr).any():
+        return df[METRICS].corr().to_numpy()
+    # Constant metrics or a single day give NaN, exactly as pandas does
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.corrcoef(arr)
+
+
+def _predictor_weights(C: np.ndarray) -> np.ndarray:
+    """Linear weights predicting each metric from the others.
+
+    Row ``k`` of the result holds the regression weights of metric ``k`` on
+    every other metric, derived from the correlation matrix ``C`` (the
+    diagonal is zero). For a well‑conditioned ``C`` all of them follow from
+    a single inverse via the partitioned‑matrix identity
+    ``w[k, j] = -Cinv[k, j] / Cinv[k, k]``. The identity does not hold for a
+    singular ``C`` (e.g. two perfectly correlated metrics or fewer days than
+    metrics), so then each leave‑one‑out system is solved on its own with
+    least squares. If any correlation is undefined every regression is too,
+    and the weights are NaN so that cross‑signal checks fail closed.
+    """
+    n_metrics = len(C)
+    if not np.isfinite(C).all():
+        W = np.full((n_metrics, n_metrics), np.nan)
+    elif np.linalg.cond(C) < _MAX_COND:
+        Cinv = np.linalg.inv(C)
+        W = -Cinv / np.diag(Cinv)[:, None]
+    else:
+        W = np.zeros((n_metrics, n_metrics))
+        for k in range(n_metrics):
+            others = [j for j in range(n_metrics) if j != k]
+            W[k, others] = np.linalg.lstsq(C[np.ix_(others, others)], C[others, k], rcond=None)[0]
+    np.fill_diagonal(W, 0.0)
+    return W
 
 
 def compute_trust_scores(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict[str, any]]]:
@@ -50,67 +126,40 @@ def compute_trust_scores(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict[str,
     """
     df_baseline = build_robust_baseline(df)
     # Compute cross‑correlation matrix using complete cases only
-    corr = df[METRICS].corr()
-    trust_entries = []
-    # Precompute simple linear predictors: for each metric m, build weights to
-    # predict m from the remaining metrics using correlation coefficients.
-    predictor_weights: Dict[str, Dict[str, float]] = {}
-    for m in METRICS:
-        # Solve linear system: corr[m, others] * weights = corr[others,m]
-        others = [o for o in METRICS if o != m]
-        sub_corr = corr.loc[others, others]
-        target = corr.loc[others, m]
-        try:
-            weights = np.linalg.solve(sub_corr.values, target.values)
-            predictor_weights[m] = dict(zip(others, weights))
-        except Exception:
-            # Fallback: no prediction if matrix is singular
-            predictor_weights[m] = {o: 0.0 for o in others}
-
-    # Iterate through rows to compute trust scores
-    for idx, row in df_baseline.iterrows():
-        date = row["date"]
-        for m in METRICS:
-            val = row.get(m)
-            median = row.get(f"{m}_median")
-            mad = row.get(f"{m}_mad")
-            # Missingness factor
-            if pd.isna(val):
-                score = 0.0
-                drivers = ["missing"]
-            else:
-                drivers = []
-                # Distribution shift factor
-                if pd.isna(median) or pd.isna(mad):
-                    # Not enough data to compute baseline
-                    z = 0.0
-                else:
-                    z = float((val - median) / (1.4826 * mad))
-                dist_score = max(0.0, 1.0 - min(abs(z) / 3.0, 1.0))  # saturate at z=3
-                if dist_score < 0.6:
-                    drivers.append("distribution shift")
-                # Cross‑signal deviation factor
-                # Compute predicted value using linear combination of other metrics
-                others = [o for o in METRICS if o != m]
-                preds = [row.get(o) if pd.notna(row.get(o)) else 0.0 for o in others]
-                predicted = sum(predictor_weights[m][o] * preds[i] for i, o in enumerate(others))
-                # Normalise residual by baseline MAD if available
-                residual = abs(val - predicted)
-                # Determine typical scale: use median absolute deviation of the metric over the entire df
-                overall_mad = _mad(df[m].dropna())
-                res_score = max(0.0, 1.0 - min(residual / (3.0 * overall_mad), 1.0))
-                if res_score < 0.6:
-                    drivers.append("cross‑signal deviation")
-                # Combine factors multiplicatively to reflect joint confidence
-                score = dist_score * res_score
-            col_name = f"trust_{m}"
-            df_baseline.at[idx, col_name] = score
-            trust_entries.append({
-                "metric": m,
-                "date": date,
-                "score": float(score),
-                "drivers": drivers,
-            })
+    C = _correlation_matrix(df)
+    W = _predictor_weights(C)
+
+    X = _metric_matrix(df_baseline)
+    # Typical scale of each metric over the entire df
+    overall_mads = _column_mads(X)
+    MED = _metric_matrix(df_baseline, "_median")
+    MAD = _metric_matrix(df_baseline, "_mad")
+    missing = np.isnan(X)
+    # Distribution shift factor; no baseline yet means no deviation
+    Z = (X - MED) / (1.4826 * MAD)
+    Z[np.isnan(Z)] = 0.0
+    dist = np.fmax(1.0 - np.minimum(np.abs(Z) / 3.0, 1.0), 0.0)  # saturate at z=3
+    # Cross‑signal deviation factor: predict every metric from the others
+    # in one matmul, treating missing predictors as 0
+    predicted = np.nan_to_num(X, nan=0.0) @ W.T
+    residual = np.abs(X - predicted)
+    # fmax maps NaN residuals (e.g. from a degenerate correlation matrix) to 0
+    res = np.fmax(1.0 - np.minimum(residual / (3.0 * overall_mads), 1.0), 0.0)
+    # Combine factors multiplicatively to reflect joint confidence
+    scores = np.where(missing, 0.0, dist * res)
+    driver_codes = np.where(missing, 4, (dist < 0.6) + 2 * (res < 0.6))
+
+    for j, m in enumerate(METRICS):
+        df_baseline[f"trust_{m}"] = scores[:, j]
+    # Build the records from plain Python lists in one comprehension;
+    # indexing the arrays per cell would box every element separately
+    trust_entries = [
+        {"metric": m, "date": date, "score": score, "drivers": list(_TRUST_DRIVERS[code])}
+        for date, row_scores, row_codes in zip(
+            df_baseline["date"].tolist(), scores.tolist(), driver_codes.tolist()
+        )
+        for m, score, code in zip(METRICS, row_scores, row_codes)
+    ]
     return df_baseline, trust_entries
 
 
@@ -124,53 +173,57 @@ def compute_anomalies(df: pd.DataFrame) -> List[Dict[str, any]]:
     whether the day is anomalous.
     """
     df_base = build_robust_baseline(df)
-    results: List[Dict[str, any]] = []
-    for idx, row in df_base.iterrows():
-        date = row["date"]
-        drivers = []
-        z_scores = []
-        for m in METRICS:
-            val = row.get(m)
-            med = row.get(f"{m}_median")
-            mad = row.get(f"{m}_mad")
-            if pd.isna(val) or pd.isna(med) or pd.isna(mad):
-                continue
-            z = float((val - med) / (1.4826 * mad))
-            z_scores.append(abs(z))
-            if abs(z) > 2.0:
-                drivers.append({
-                    "metric": m,
-                    "value": float(val),
-                    "z_score": z,
-                    "direction": "high" if z > 0 else "low",
-                })
-        if not z_scores:
-            score = 0.0
-        else:
-            z_arr = np.array(z_scores)
-            score = float(np.mean(z_arr) + 0.25 * np.max(z_arr))
-        is_anom = score >= 1.5
-        # Craft narrative message
-        if score < 1.0:
-            narrative = f"{date}: Within normal variation."
-        elif not drivers:
-            narrative = f"{date}: Elevated deviation detected but no specific metric stands out."
-        else:
-            top = sorted(drivers, key=lambda d: abs(d["z_score"]), reverse=True)[:2]
-            parts = []
-            for d in top:
-                direction = "above" if d["direction"] == "high" else "below"
-                parts.append(f"{d['metric'].replace('_',' ')} is {direction} baseline (z={d['z_score']:.1f})")
-            narrative = f"{date}: Anomaly (score={score:.2f}). " + "; ".join(parts) + "."
-        results.append({
-            "user_id": row["user_id"],
+    X = _metric_matrix(df_base)
+    # NaN wherever the value or its baseline is missing; those cells are skipped
+    Z = (X - _metric_matrix(df_base, "_median")) / (1.4826 * _metric_matrix(df_base, "_mad"))
+    abs_z = np.abs(Z)
+    valid = ~np.isnan(abs_z)
+    n_valid = valid.sum(axis=1)
+    filled = np.where(valid, abs_z, 0.0)
+    scores = np.where(
+        n_valid > 0,
+        filled.sum(axis=1) / np.maximum(n_valid, 1) + 0.25 * filled.max(axis=1),
+        0.0,
+    ).tolist()
+    is_driver = abs_z > 2.0
+    # Metrics ordered by |z| descending per day (NaN last, ties in METRICS order)
+    ranked = np.argsort(-abs_z, axis=1, kind="stable")
+
+    # Drivers and narratives only need Python work on the few flagged days
+    drivers: Dict[int, List[Dict[str, any]]] = {}
+    narratives: Dict[int, str] = {}
+    for i in np.flatnonzero(is_driver.any(axis=1)).tolist():
+        drivers[i] = [
+            {
+                "metric": METRICS[j],
+                "value": float(X[i, j]),
+                "z_score": float(Z[i, j]),
+                "direction": "high" if Z[i, j] > 0 else "low",
+            }
+            for j in np.flatnonzero(is_driver[i]).tolist()
+        ]
+    dates = df_base["date"].tolist()
+    for i in np.flatnonzero(np.asarray(scores) >= 1.0).tolist():
+        if i not in drivers:
+            narratives[i] = f"{dates[i]}: Elevated deviation detected but no specific metric stands out."
+            continue
+        parts = []
+        for j in [j for j in ranked[i].tolist() if is_driver[i, j]][:2]:
+            direction = "above" if Z[i, j] > 0 else "below"
+            parts.append(f"{METRICS[j].replace('_',' ')} is {direction} baseline (z={Z[i, j]:.1f})")
+        narratives[i] = f"{dates[i]}: Anomaly (score={scores[i]:.2f}). " + "; ".join(parts) + "."
+
+    return [
+        {
+            "user_id": user_id,
             "date": date,
             "anomaly_score": score,
-            "is_anomaly": is_anom,
-            "drivers": drivers,
-            "narrative": narrative,
-        })
-    return results
+            "is_anomaly": score >= 1.5,
+            "drivers": drivers.get(i, []),
+            "narrative": narratives.get(i) or f"{date}: Within normal variation.",
+        }
+        for i, (user_id, date, score) in enumerate(zip(df_base["user_id"].tolist(), dates, scores))
+    ]
 
 
 def compute_correlations(df: pd.DataFrame) -> List[Dict[str, any]]:
@@ -181,20 +234,14 @@ def compute_correlations(df: pd.DataFrame) -> List[Dict[str, any]]:
     where one or both metrics have insufficient data produce NaN and are
     omitted.
     """
-    corr = df[METRICS].corr()
-    correlations: List[Dict[str, any]] = []
-    for i, m1 in enumerate(METRICS):
-        for j in range(i + 1, len(METRICS)):
-            m2 = METRICS[j]
-            c = corr.loc[m1, m2]
-            if pd.isna(c):
-                continue
-            correlations.append({
-                "metric_x": m1,
-                "metric_y": m2,
-                "correlation": float(c),
-            })
-    return correlations
+    corr = _correlation_matrix(df)
+    # The matrix is symmetric, so only the upper triangle is read
+    iu = np.triu_indices(len(METRICS), k=1)
+    return [
+        {"metric_x": METRICS[i], "metric_y": METRICS[j], "correlation": float(c)}
+        for i, j, c in zip(*iu, corr[iu])
+        if not np.isnan(c)
+    ]
 
 
 def simulate_attack(df: pd.DataFrame, mode: str = "missing", fraction: float = 0.1) -> pd.DataFrame:
@@ -207,26 +254,71 @@ def simulate_attack(df: pd.DataFrame, mode: str = "missing", fraction: float = 0
     • delay – copy values from a previous day to simulate delayed upload.
     • spoof – multiply values by a factor to simulate spoofed sensor data.
     • noise – add Gaussian noise to random values.
+
+    Integer metric columns stay integral: tampered values are rounded and
+    the column becomes a nullable ``Int64`` so removed values become NA.
     """
     perturbed = df.copy()
     n_rows = len(df)
-    for m in METRICS:
-        n_vals = int(n_rows * fraction)
-        indices = random.sample(range(n_rows), n_vals) if n_vals > 0 else []
-        for idx in indices:
-            if mode == "missing":
-                perturbed.at[idx, m] = np.nan
-            elif mode == "delay":
-                # Copy value from three days earlier if available
-                src = max(0, idx - 3)
-                perturbed.at[idx, m] = df.at[src, m]
-            elif mode == "spoof":
-                val = df.at[idx, m]
-                if pd.notna(val):
-                    perturbed.at[idx, m] = val * (1.5 + random.random())  # between 1.5x and 2.5x
-            elif mode == "noise":
-                val = df.at[idx, m]
-                if pd.notna(val):
-                    noise = np.random.normal(0, 0.1 * abs(val) if val != 0 else 0.1)
-                    perturbed.at[idx, m] = val + noise
+    n_vals = int(n_rows * fraction)
+    if n_vals == 0:
+        return perturbed
+    rng = np.random.default_rng()
+    original = _metric_matrix(df)
+    arr = original.copy()
+    # Draw n_vals distinct rows independently for every metric column
+    rows = np.argsort(rng.random(arr.shape), axis=0)[:n_vals]
+    cols = np.broadcast_to(np.arange(arr.shape[1]), rows.shape)
+    vals = original[rows, cols]
+    if mode == "missing":
+        arr[rows, cols] = np.nan
+    elif mode == "delay":
+        # Copy value from three days earlier if available
+        arr[rows, cols] = original[np.maximum(0, rows - 3), cols]
+    elif mode == "spoof":
+        arr[rows, cols] = vals * (1.5 + rng.random(vals.shape))  # between 1.5x and 2.5x
+    elif mode == "noise":
+        # NaN values stay NaN; their scale is irrelevant
+        scale = np.where(vals != 0, 0.1 * np.abs(np.nan_to_num(vals)), 0.1)
+        arr[rows, cols] = vals + rng.normal(0.0, scale)
+    perturbed[METRICS] = arr
+    for j, m in enumerate(METRICS):
+        if pd.api.types.is_integer_dtype(df[m]):
+            perturbed[m] = pd.Series(np.round(arr[:, j]), index=perturbed.index).astype("Int64")
     return perturbed
+
+
+# Entry points for the API's process pool. They take only the NumPy matrix
+# and plain Python values produced by the database layer so that arguments
+# and results pickle cheaply across the process boundary.
+
+def compute_trust_scores_from_arr(values: np.ndarray, dates: List[str], user_id: str) -> List[Dict[str, any]]:
+    """Trust score entries for a ``(n_days, n_metrics)`` matrix of :data:`METRICS`."""
+    _, trust_entries = compute_trust_scores(metric_frame(user_id, dates, values))
+    return trust_entries
+
+
+def compute_anomalies_from_arr(values: np.ndarray, dates: List[str], user_id: str) -> List[Dict[str, any]]:
+    """Daily anomaly results for a ``(n_days, n_metrics)`` matrix of :data:`METRICS`."""
+    return compute_anomalies(metric_frame(user_id, dates, values))
+
+
+def compute_correlations_from_arr(values: np.ndarray, dates: List[str], user_id: str) -> List[Dict[str, any]]:
+    """Pairwise correlations for a ``(n_days, n_metrics)`` matrix of :data:`METRICS`."""
+    return compute_correlations(metric_frame(user_id, dates, values))
+
+
+def simulate_from_records(
+    records: List[Dict[str, any]], mode: str, fraction: float
+) -> Tuple[List[Dict[str, any]], List[Dict[str, any]]]:
+    """Tamper with a user's records and detect anomalies on the result.
+
+    Returns the tampered records, with missing values as None and integer
+    metrics as ints, and the anomaly results computed on them.
+    """
+    # Nullable ints keep integer metrics integral even when some are NULL
+    df = pd.DataFrame(records).astype({m: "Int64" for m in INTEGER_METRICS}).sort_values("date")
+    tampered = simulate_attack(df, mode=mode, fraction=fraction)
+    results = compute_anomalies(tampered)
+    tampered_records = tampered.astype(object).where(tampered.notna(), None).to_dict(orient="records")
+    return tampered_records, results
@@ -0,0 +1,46 @@
+"""Shared helpers for the model classes.
+
+:class:`MetricMatrixMixin` gives :class:`TrustEngine` and
+:class:`AnomalyDetector` a single way of turning their metric columns into
+the float matrix all of their numerical code works on.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class MetricMatrixMixin:
+    """Project a DataFrame's metric columns to a contiguous float matrix.
+
+    Classes using the mixin must set ``self.metrics``.
+    """
+
+    # Precision of the z‑score and trust working matrices. Their decision
+    # thresholds (0.6, 1.5, 2.0, 3.0) are coarse, so single precision halves
+    # the memory traffic of the elementwise passes without changing results
+    # beyond float32 rounding. Values reported back to callers are still
+    # read in float64.
+    WORK_DTYPE = np.float32
+
+    metrics: List[str]
+
+    def _matrix(self, df: pd.DataFrame, suffix: str = "", dtype: type = np.float64) -> np.ndarray:
+        """Return the ``(n_days, n_metrics)`` float matrix of the metric columns.
+
+        ``suffix`` selects derived columns instead, e.g. ``"_median"`` for
+        the baseline. The matrix is row‑major so each day is one contiguous
+        run of memory, as the per‑day kernels expect.
+        """
+        cols = [f"{m}{suffix}" for m in self.metrics] if suffix else self.metrics
+        return np.ascontiguousarray(df[cols].to_numpy(dtype=dtype, copy=False))
+
+    def _matrix_with_mask(
+        self, df: pd.DataFrame, suffix: str = "", dtype: type = np.float64
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return :meth:`_matrix` together with its NaN mask."""
+        mat = self._matrix(df, suffix, dtype)
+        return mat, np.isnan(mat)
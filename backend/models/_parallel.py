@@ -0,0 +1,33 @@
+"""Thread fan‑out for running a per‑user model computation over many users.
+
+Used by the ``*_batch`` methods of :class:`TrustEngine` and
+:class:`AnomalyDetector`.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+# Batches with fewer rows than this in total run serially: below it, thread
+# hand‑off costs more than it saves
+PARALLEL_MIN_ROWS = 2048
+
+
+def map_frames(fn: Callable[[pd.DataFrame], T], dfs: Sequence[pd.DataFrame]) -> List[T]:
+    """Apply ``fn`` to each DataFrame, in parallel threads when worthwhile.
+
+    The heavy lifting in ``fn`` happens in NumPy, BLAS and the Numba
+    kernels, which release the GIL, so threads scale across cores without
+    copying the frames into other processes. Results keep the order of
+    ``dfs``.
+    """
+    if len(dfs) < 2 or sum(len(df) for df in dfs) < PARALLEL_MIN_ROWS:
+        return [fn(df) for df in dfs]
+    with ThreadPoolExecutor(max_workers=min(len(dfs), os.cpu_count() or 1)) as pool:
+        return list(pool.map(fn, dfs))
@@ -0,0 +1,66 @@
+"""Numba kernel for the per‑cell trust scores of :class:`TrustEngine`.
+
+The kernel computes the distribution‑shift and cross‑signal factors, their
+product and the driver code of every (day, metric) cell in a single pass
+over the data, with the days processed in parallel with ``prange``. It
+mirrors :func:`trust_engine._trust_arrays` exactly, including how NaNs are
+handled, so ``fastmath`` is deliberately not enabled.
+
+Importing this module requires numba; :mod:`trust_engine` falls back to
+its NumPy implementation when the import fails.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(parallel=True, cache=True)
+def trust_kernel(
+    vals: np.ndarray,
+    meds: np.ndarray,
+    mads: np.ndarray,
+    W: np.ndarray,
+    scale: np.ndarray,
+    out_trust: np.ndarray,
+    out_codes: np.ndarray,
+) -> None:
+    """Fill ``out_trust``/``out_codes`` for a ``(n_days, n_metrics)`` matrix.
+
+    ``meds``/``mads`` are the rolling baseline of ``vals``, ``W`` the
+    zero‑diagonal predictor weights and ``scale`` three times the overall
+    MAD of each metric. Codes index ``trust_engine._TRUST_DRIVERS``.
+    """
+    n, k = vals.shape
+    for i in prange(n):
+        for j in range(k):
+            v = vals[i, j]
+            if np.isnan(v):
+                out_trust[i, j] = 0.0
+                out_codes[i, j] = 4
+                continue
+            # Distribution shift factor; no baseline yet means no deviation
+            z = (v - meds[i, j]) / (1.4826 * mads[i, j])
+            if np.isnan(z):
+                z = 0.0
+            d = abs(z) / 3.0
+            dist = 1.0 - d if d < 1.0 else 0.0
+            # Cross-signal factor, treating missing predictors as 0; NaN
+            # weights give a NaN residual and so a zero score
+            predicted = 0.0
+            for m in range(k):
+                x = vals[i, m]
+                predicted += W[j, m] * (0.0 if np.isnan(x) else x)
+            r = abs(v - predicted) / scale[j]
+            res = 1.0 - r if r < 1.0 else 0.0
+            out_trust[i, j] = dist * res
+            out_codes[i, j] = (dist < 0.6) + 2 * (res < 0.6)
+
+
+# Compile (or load from the on-disk cache) at import so the first request
+# does not pay the JIT cost. TrustEngine calls it with float32 working matrices.
+_warm = np.zeros((2, 2), dtype=np.float32)
+_ones = np.ones((2, 2), dtype=np.float32)
+trust_kernel(_warm, _warm, _ones, _warm, _ones[0], np.empty_like(_warm), np.empty((2, 2), dtype=np.int64))
+del _warm, _ones
@@ -9,15 +9,17 @@ latency, spoofing or noise into data to test detection resilience.
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Sequence
 
 import numpy as np
 import pandas as pd
 
-from ..data_pipeline.normalization import build_robust_baseline, _mad
+from ..data_pipeline.normalization import build_robust_baseline
+from ._mixins import MetricMatrixMixin
+from ._parallel import map_frames
 
 
-class AnomalyDetector:
+class AnomalyDetector(MetricMatrixMixin):
     """Detect anomalies, simulate attacks and compute security metrics.
 
     Parameters
@@ -56,56 +58,101 @@ class AnomalyDetector:
             ``anomaly_score``, ``is_anomaly``, a list of ``drivers`` and a
             ``narrative``.
         """
-        df_base = build_robust_baseline(df)
-        results: List[Dict[str, any]] = []
-        for idx, row in df_base.iterrows():
-            date = row["date"]
-            drivers = []
-            z_scores = []
-            for m in self.metrics:
-                val = row.get(m)
-                med = row.get(f"{m}_median")
-                mad = row.get(f"{m}_mad")
-                if pd.isna(val) or pd.isna(med) or pd.isna(mad):
-                    continue
-                z = float((val - med) / (1.4826 * mad))
-                z_scores.append(abs(z))
-                if abs(z) > 2.0:
-                    drivers.append({
-                        "metric": m,
-                        "value": float(val),
-                        "z_score": z,
-                        "direction": "high" if z > 0 else "low",
-                    })
-            if not z_scores:
-                score = 0.0
-            else:
-                z_arr = np.array(z_scores)
-                score = float(np.mean(z_arr) + 0.25 * np.max(z_arr))
-            is_anom = score >= 1.5
-            # Craft narrative
-            if score < 1.0:
-                narrative = f"{date}: Within normal variation."
-            elif not drivers:
-                narrative = f"{date}: Elevated deviation detected but no specific metric stands out."
-            else:
-                top = sorted(drivers, key=lambda d: abs(d["z_score"]), reverse=True)[:2]
-                parts = []
-                for d in top:
-                    direction = "above" if d["direction"] == "high" else "below"
-                    parts.append(f"{d['metric'].replace('_',' ')} is {direction} baseline (z={d['z_score']:.1f})")
-                narrative = f"{date}: Anomaly (score={score:.2f}). " + "; ".join(parts) + "."
-            results.append({
-                "user_id": row["user_id"],
+        return self._compute_anomalies_from_base(build_robust_baseline(df, metrics=self.metrics))
+
+    def compute_anomalies_batch(self, dfs: Sequence[pd.DataFrame]) -> List[List[Dict[str, any]]]:
+        """Run :meth:`compute_anomalies` on several users' DataFrames.
+
+        Users are processed in parallel threads once the batch is large
+        enough to benefit. Results are returned in the order of ``dfs``.
+        """
+        return map_frames(self.compute_anomalies, dfs)
+
+    def _compute_anomalies_from_base(self, df_base: pd.DataFrame) -> List[Dict[str, any]]:
+        """Detect anomalies in a DataFrame that already has its baseline.
+
+        ``df_base`` is the output of :func:`build_robust_baseline` for this
+        detector's metrics, so callers that also need trust scores can share
+        one baseline.
+        """
+        vals = self._matrix(df_base)
+        meds = self._matrix(df_base, "_median", self.WORK_DTYPE)
+        mads = self._matrix(df_base, "_mad", self.WORK_DTYPE)
+        # NaN wherever the value or its baseline is missing; those cells are skipped
+        z = (vals.astype(self.WORK_DTYPE) - meds) / (self.WORK_DTYPE(1.4826) * mads)
+        absz = np.abs(z)
+        valid = ~np.isnan(absz)
+        counts = valid.sum(axis=1)
+        filled = np.where(valid, absz, 0.0)
+        scores = np.where(
+            counts > 0,
+            filled.sum(axis=1) / np.maximum(counts, 1) + 0.25 * filled.max(axis=1),
+            0.0,
+        ).tolist()
+        is_driver = absz > 2.0
+
+        # Every driver cell as a (metric, value, z) tuple in day order; each
+        # day's drivers are the slice between consecutive bounds. Dicts are
+        # only built for the output.
+        drv_rows, drv_cols = np.nonzero(is_driver)
+        driver_tuples = list(zip(
+            [self.metrics[j] for j in drv_cols.tolist()],
+            vals[drv_rows, drv_cols].tolist(),
+            z[drv_rows, drv_cols].tolist(),
+        ))
+        bounds = np.searchsorted(drv_rows, np.arange(len(scores) + 1)).tolist()
+        has_drivers = is_driver.any(axis=1)
+
+        # Only days with an elevated score need a narrative. It names the two
+        # drivers with the largest |z|, picked by two argmax passes over the
+        # driver cells; argmax keeps the first metric on ties, like a stable sort.
+        dates = df_base["date"].tolist()
+        rows = np.flatnonzero(np.asarray(scores) >= 1.0)
+        pos = np.arange(len(rows))
+        key = np.where(is_driver[rows], absz[rows], -1.0)
+        top1 = key.argmax(axis=1)
+        key[pos, top1] = -1.0
+        top2 = key.argmax(axis=1)
+        has_top2 = key[pos, top2] > 0
+        z1, z2 = z[rows, top1], z[rows, top2]
+        labels = [m.replace("_", " ") for m in self.metrics]
+        narratives: Dict[int, str] = {}
+        for i, j1, zv1, d1, j2, zv2, d2, two in zip(
+            rows.tolist(),
+            top1.tolist(), z1.tolist(), np.where(z1 > 0, "above", "below").tolist(),
+            top2.tolist(), z2.tolist(), np.where(z2 > 0, "above", "below").tolist(),
+            has_top2.tolist(),
+        ):
+            if not has_drivers[i]:
+                narratives[i] = f"{dates[i]}: Elevated deviation detected but no specific metric stands out."
+                continue
+            parts = f"{labels[j1]} is {d1} baseline (z={zv1:.1f})"
+            if two:
+                parts += f"; {labels[j2]} is {d2} baseline (z={zv2:.1f})"
+            narratives[i] = f"{dates[i]}: Anomaly (score={scores[i]:.2f}). {parts}."
+
+        return [
+            {
+                "user_id": user_id,
                 "date": date,
                 "anomaly_score": score,
-                "is_anomaly": is_anom,
-                "drivers": drivers,
-                "narrative": narrative,
-            })
-        return results
+                "is_anomaly": score >= 1.5,
+                "drivers": [
+                    {"metric": m, "value": v, "z_score": zv, "direction": "high" if zv > 0 else "low"}
+                    for m, v, zv in driver_tuples[bounds[i]:bounds[i + 1]]
+                ],
+                "narrative": narratives.get(i) or f"{date}: Within normal variation.",
+            }
+            for i, (user_id, date, score) in enumerate(zip(df_base["user_id"].tolist(), dates, scores))
+        ]
 
-    def simulate_attack(self, df: pd.DataFrame, mode: str = "missing", fraction: float = 0.1) -> pd.DataFrame:
+    def simulate_attack(
+        self,
+        df: pd.DataFrame,
+        mode: str = "missing",
+        fraction: float = 0.1,
+        rng: np.random.Generator | None = None,
+    ) -> pd.DataFrame:
         """Simulate adversarial tampering or noise injection on a copy of df.
 
         Supported modes:
@@ -114,27 +161,37 @@ class AnomalyDetector:
         * ``delay`` – copy values from a previous day to simulate delayed upload.
         * ``spoof`` – multiply values by a factor to simulate spoofed sensor data.
         * ``noise`` – add Gaussian noise to random values.
+
+        ``rng`` is the random generator to draw from; a fresh unseeded one is
+        used when it is None.
         """
         perturbed = df.copy()
         n_rows = len(df)
-        for m in self.metrics:
-            n_vals = int(n_rows * fraction)
-            indices = np.random.choice(n_rows, n_vals, replace=False) if n_vals > 0 else []
-            for idx in indices:
-                if mode == "missing":
-                    perturbed.at[idx, m] = np.nan
-                elif mode == "delay":
-                    src = max(0, idx - 3)
-                    perturbed.at[idx, m] = df.at[src, m]
-                elif mode == "spoof":
-                    val = df.at[idx, m]
-                    if pd.notna(val):
-                        perturbed.at[idx, m] = val * (1.5 + np.random.rand())
-                elif mode == "noise":
-                    val = df.at[idx, m]
-                    if pd.notna(val):
-                        noise = np.random.normal(0, 0.1 * abs(val) if val != 0 else 0.1)
-                        perturbed.at[idx, m] = val + noise
+        n_vals = int(n_rows * fraction)
+        if n_vals == 0:
+            return perturbed
+        if rng is None:
+            rng = np.random.default_rng()
+        original = self._matrix(df)
+        arr = original.copy()
+        # Draw n_vals distinct rows independently for every metric column
+        rows = np.argsort(rng.random(arr.shape), axis=0)[:n_vals]
+        cols = np.broadcast_to(np.arange(arr.shape[1]), rows.shape)
+        vals = original[rows, cols]
+        if mode == "missing":
+            arr[rows, cols] = np.nan
+        elif mode == "delay":
+            # Copy value from three days earlier if available
+            arr[rows, cols] = original[np.maximum(0, rows - 3), cols]
+        elif mode == "spoof":
+            # NaN values stay NaN
+            arr[rows, cols] = vals * (1.5 + rng.random(vals.shape))
+        elif mode == "noise":
+            scale = np.where(vals != 0, 0.1 * np.abs(np.nan_to_num(vals)), 0.1)
+            arr[rows, cols] = vals + rng.normal(0.0, scale)
+        else:
+            return perturbed
+        perturbed[self.metrics] = arr
         return perturbed
 
     def compute_security_metrics(self, df: pd.DataFrame) -> Dict[str, float]:
@@ -152,40 +209,47 @@ class AnomalyDetector:
         # We reuse TrustEngine to compute trust scores on the fly
         from .trust_engine import TrustEngine  # imported here to avoid circular import
         trust_engine = TrustEngine(metrics=self.metrics)
-        _, trust_entries = trust_engine.compute_trust_scores(df)
+        # Both the trust scores and the anomalies are measured against the
+        # same rolling baseline, so it is only computed once
+        df_base = build_robust_baseline(df, metrics=self.metrics)
+        _, trust_entries = trust_engine._compute_trust_from_base(df_base)
         trust_vals = [t["score"] for t in trust_entries]
         mean_trust = float(np.mean(trust_vals)) if trust_vals else 1.0
         attack_surface = 1.0 - mean_trust
         signal_integrity = mean_trust
         # Ground truth anomalies: any day with missing values
-        true_anomaly_dates = []
-        for _, row in df.iterrows():
-            if any(pd.isna(row.get(m)) for m in self.metrics):
-                true_anomaly_dates.append(row["date"])
+        _, missing = self._matrix_with_mask(df)
+        true_anomaly_dates = df.loc[missing.any(axis=1), "date"].tolist()
         # Detected anomalies
-        det_results = self.compute_anomalies(df)
+        det_results = self._compute_anomalies_from_base(df_base)
         detected_dates = [r["date"] for r in det_results if r["is_anomaly"]]
         if not true_anomaly_dates:
             precision = 1.0
             recall = 1.0
             mttd = 0.0
         else:
-            tp = len([d for d in detected_dates if d in true_anomaly_dates])
-            fp = len(detected_dates) - tp
-            fn = len([d for d in true_anomaly_dates if d not in detected_dates])
+            # Dates are unique per user, so set operations count each day once
+            true_set = set(true_anomaly_dates)
+            detected_set = set(detected_dates)
+            tp = len(detected_set & true_set)
+            fp = len(detected_set - true_set)
+            fn = len(true_set - detected_set)
             precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
             recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
             # MTTD calculation
-            date_to_idx = {row["date"]: idx for idx, row in df.reset_index(drop=True).iterrows()}
+            date_to_idx = {d: idx for idx, d in enumerate(df["date"].tolist())}
+            # Positions of the detections in ascending order, so the first
+            # detection after an anomaly is found by binary search
+            det_idx_sorted = np.sort([date_to_idx[d] for d in detected_dates]).astype(int)
             mttd_vals = []
             for adate in true_anomaly_dates:
-                if adate in detected_dates:
+                if adate in detected_set:
                     mttd_vals.append(0.0)
                 else:
                     a_idx = date_to_idx[adate]
-                    future_detect_indices = [date_to_idx[d] for d in detected_dates if date_to_idx[d] > a_idx]
-                    if future_detect_indices:
-                        mttd_vals.append(min(future_detect_indices) - a_idx)
+                    pos = int(np.searchsorted(det_idx_sorted, a_idx, side="right"))
+                    if pos < len(det_idx_sorted):
+                        mttd_vals.append(int(det_idx_sorted[pos]) - a_idx)
             mttd = float(np.mean(mttd_vals)) if mttd_vals else 0.0
         return {
             "attack_surface_score": attack_surface,
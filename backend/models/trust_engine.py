@@ -10,15 +10,56 @@ distribution to a global cohort distribution in a privacy‑preserving way.
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
-from ..data_pipeline.normalization import build_robust_baseline, _mad
-
-
-class TrustEngine:
+from ..data_pipeline.normalization import build_robust_baseline, _column_mads
+from ._mixins import MetricMatrixMixin
+from ._parallel import map_frames
+
+try:
+    from ._trust_numba import trust_kernel
+except ImportError:  # numba is optional; fall back to the NumPy arrays below
+    trust_kernel = None
+
+# Trust drivers indexed by ``(dist < 0.6) + 2 * (res < 0.6)``, or 4 if missing
+_TRUST_DRIVERS = (
+    (),
+    ("distribution shift",),
+    ("cross‑signal deviation",),
+    ("distribution shift", "cross‑signal deviation"),
+    ("missing",),
+)
+
+
+def _trust_arrays(
+    vals: np.ndarray, meds: np.ndarray, mads: np.ndarray, W: np.ndarray, scale: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Trust scores and driver codes of a ``(n_days, n_metrics)`` matrix.
+
+    ``meds``/``mads`` are the rolling baseline of ``vals``, ``W`` the
+    zero‑diagonal predictor weights and ``scale`` three times the overall
+    MAD of each metric. Codes index :data:`_TRUST_DRIVERS`.
+    """
+    missing = np.isnan(vals)
+    # Distribution shift factor; no baseline yet means no deviation
+    z = (vals - meds) / (1.4826 * mads)
+    z[np.isnan(z)] = 0.0
+    dist_scores = np.fmax(1.0 - np.minimum(np.abs(z) / 3.0, 1.0), 0.0)
+    # Cross‑signal deviation factor, treating missing predictors as 0
+    predicted = np.nan_to_num(vals, nan=0.0) @ W.T
+    residual = np.abs(vals - predicted)
+    # fmax maps NaN residuals (from a degenerate correlation matrix) to 0
+    res_scores = np.fmax(1.0 - np.minimum(residual / scale, 1.0), 0.0)
+    # Combine factors multiplicatively
+    trust = np.where(missing, 0.0, dist_scores * res_scores)
+    codes = np.where(missing, 4, (dist_scores < 0.6) + 2 * (res_scores < 0.6))
+    return trust, codes
+
+
+class TrustEngine(MetricMatrixMixin):
     """Compute trust scores for health metrics and federated trust for a user.
 
     Parameters
@@ -63,62 +104,82 @@ class TrustEngine:
             a list of dictionaries with keys ``metric``, ``date``, ``score`` and
             ``drivers``.
         """
-        df_baseline = build_robust_baseline(df)
+        return self._compute_trust_from_base(build_robust_baseline(df, metrics=self.metrics))
+
+    def compute_trust_scores_batch(
+        self, dfs: Sequence[pd.DataFrame]
+    ) -> List[Tuple[pd.DataFrame, List[Dict[str, any]]]]:
+        """Run :meth:`compute_trust_scores` on several users' DataFrames.
+
+        Users are processed in parallel threads once the batch is large
+        enough to benefit. Results are returned in the order of ``dfs``.
+        """
+        return map_frames(self.compute_trust_scores, dfs)
+
+    def _compute_trust_from_base(self, df_baseline: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict[str, any]]]:
+        """Compute trust scores for a DataFrame that already has its baseline.
+
+        ``df_baseline`` is the output of :func:`build_robust_baseline` for
+        this engine's metrics, so callers that also need anomalies can share
+        one baseline. It is not modified.
+        """
         # Compute correlation matrix using complete cases only
-        corr = df[self.metrics].corr()
-        trust_entries: List[Dict[str, any]] = []
-        # Precompute linear predictors: for each metric m, compute weights to
-        # predict m from other metrics using correlation coefficients.
-        predictor_weights: Dict[str, Dict[str, float]] = {}
-        for m in self.metrics:
-            others = [o for o in self.metrics if o != m]
-            sub_corr = corr.loc[others, others]
-            target = corr.loc[others, m]
-            try:
-                weights = np.linalg.solve(sub_corr.values, target.values)
-                predictor_weights[m] = dict(zip(others, weights))
-            except Exception:
-                predictor_weights[m] = {o: 0.0 for o in others}
-        # Iterate through rows to compute trust scores
-        for idx, row in df_baseline.iterrows():
-            date = row["date"]
-            for m in self.metrics:
-                val = row.get(m)
-                median = row.get(f"{m}_median")
-                mad = row.get(f"{m}_mad")
-                if pd.isna(val):
-                    score = 0.0
-                    drivers = ["missing"]
-                else:
-                    drivers = []
-                    # Distribution shift factor
-                    if pd.isna(median) or pd.isna(mad):
-                        z = 0.0
-                    else:
-                        z = float((val - median) / (1.4826 * mad))
-                    dist_score = max(0.0, 1.0 - min(abs(z) / 3.0, 1.0))
-                    if dist_score < 0.6:
-                        drivers.append("distribution shift")
-                    # Cross‑signal deviation factor
-                    others = [o for o in self.metrics if o != m]
-                    preds = [row.get(o) if pd.notna(row.get(o)) else 0.0 for o in others]
-                    predicted = sum(predictor_weights[m][o] * preds[i] for i, o in enumerate(others))
-                    residual = abs(val - predicted)
-                    # Normalise residual by overall MAD of the metric
-                    overall_mad = _mad(df[m].dropna())
-                    res_score = max(0.0, 1.0 - min(residual / (3.0 * overall_mad), 1.0))
-                    if res_score < 0.6:
-                        drivers.append("cross‑signal deviation")
-                    # Combine factors multiplicatively
-                    score = dist_score * res_score
-                col_name = f"trust_{m}"
-                df_baseline.at[idx, col_name] = score
-                trust_entries.append({
-                    "metric": m,
-                    "date": date,
-                    "score": float(score),
-                    "drivers": drivers,
-                })
+        corr = df_baseline[self.metrics].corr()
+        # Precompute linear predictors: for each metric, weights predicting it
+        # from the other metrics using correlation coefficients. All k
+        # leave-one-out systems are stacked and solved in one batched call.
+        C = corr.to_numpy()
+        k = len(self.metrics)
+        others = ~np.eye(k, dtype=bool)
+        C_stack = np.broadcast_to(C, (k, k, k))[others[:, :, None] & others[:, None, :]].reshape(k, k - 1, k - 1)
+        T_stack = C.T[others].reshape(k, k - 1)
+        try:
+            weights = np.linalg.solve(C_stack, T_stack[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            # One singular system fails the whole batch; solve them one by one
+            # so only the affected metrics fall back to zero weights
+            weights = np.zeros((k, k - 1))
+            for i in range(k):
+                try:
+                    weights[i] = np.linalg.solve(C_stack[i], T_stack[i])
+                except np.linalg.LinAlgError:
+                    pass
+        # Dense (k, k) weight matrix with a zero diagonal so every metric can
+        # be predicted from the others in one matmul
+        W = np.zeros((k, k), dtype=self.WORK_DTYPE)
+        W[others] = weights.ravel()
+        raw = self._matrix(df_baseline)
+        vals = raw.astype(self.WORK_DTYPE)
+        meds = self._matrix(df_baseline, "_median", self.WORK_DTYPE)
+        mads = self._matrix(df_baseline, "_mad", self.WORK_DTYPE)
+        # Residuals are normalised by the typical scale (overall MAD) of
+        # each metric over the entire df
+        scale = (3.0 * _column_mads(raw)).astype(self.WORK_DTYPE)
+        if trust_kernel is not None:
+            trust_out = np.empty_like(vals)
+            driver_codes = np.empty(vals.shape, dtype=np.int64)
+            trust_kernel(vals, meds, mads, W, scale, trust_out, driver_codes)
+        else:
+            trust_out, driver_codes = _trust_arrays(vals, meds, mads, W, scale)
+        # Scores leave the engine in double precision
+        trust_out = trust_out.astype(np.float64)
+        trust_entries = [
+            {"metric": m, "date": date, "score": score, "drivers": list(_TRUST_DRIVERS[code])}
+            for date, row_scores, row_codes in zip(
+                df_baseline["date"].tolist(), trust_out.tolist(), driver_codes.tolist()
+            )
+            for m, score, code in zip(self.metrics, row_scores, row_codes)
+        ]
+        # Attach all trust columns as one block rather than cell by cell,
+        # replacing any left over from scoring the same frame before
+        trust_cols = [f"trust_{m}" for m in self.metrics]
+        df_baseline = pd.concat(
+            [
+                df_baseline.drop(columns=trust_cols, errors="ignore"),
+                pd.DataFrame(trust_out, columns=trust_cols, index=df_baseline.index),
+            ],
+            axis=1,
+        )
         return df_baseline, trust_entries
 
     def _compute_embedding(self, df: pd.DataFrame) -> np.ndarray:
@@ -127,14 +188,12 @@ class TrustEngine:
         The embedding is the mean of each metric across the DataFrame, normalised
         to unit length. Missing values are ignored when computing the mean.
         """
-        means = []
-        for m in self.metrics:
-            series = df[m].dropna()
-            if len(series) == 0:
-                means.append(0.0)
-            else:
-                means.append(float(series.mean()))
-        vec = np.array(means, dtype=float)
+        vals, missing = self._matrix_with_mask(df)
+        counts = (~missing).sum(axis=0)
+        # All-NaN metrics have no mean and contribute 0
+        vec = np.divide(
+            np.where(missing, 0.0, vals).sum(axis=0), counts, out=np.zeros(len(counts)), where=counts > 0
+        )
         norm = np.linalg.norm(vec) + 1e-8
         return vec / norm
 
@@ -37,6 +37,12 @@ class HealthRecordOut(HealthRecordIn):
     id: int = Field(..., description="Database primary key")
 
 
+class BulkUpsertOut(BaseModel):
+    """Schema returned after a bulk insert or update of health records."""
+
+    count: int = Field(..., description="Number of records inserted or updated")
+
+
 class TrustScore(BaseModel):
     """Trust score for a single metric on a given day.
 
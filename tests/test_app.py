@@ -0,0 +1,182 @@
+"""API tests for record ingestion, the cached compute endpoints and /simulate.
+
+The app runs against a temporary SQLite database through Starlette's
+``TestClient``, which also runs the lifespan handler and so the compute
+process pool.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend import cache, db
+
+
+def _records(user_id: str, n_days: int, seed: int = 0) -> list:
+    """Return ``n_days`` of plausible daily records for ``user_id``."""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'user_id': user_id,
+            'date': f'2024-01-{day + 1:02d}',
+            'sleep_hours': float(rng.normal(7, 0.5)),
+            'resting_hr': float(rng.normal(60, 5)),
+            'hrv': float(rng.normal(50, 10)),
+            'steps': int(rng.integers(6000, 10000)),
+            'calories': float(rng.normal(2000, 200)),
+            'weight': float(rng.normal(70, 3)),
+        }
+        for day in range(n_days)
+    ]
+
+
+class TestApi(unittest.TestCase):
+    """Test suite for the FastAPI app in backend.app."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls._tmp.name, 'test.sqlite3')
+        cls._patches = [
+            mock.patch.object(db, 'DB_PATH', cls.db_path),
+            mock.patch.object(app_module, 'COMPUTE_WORKERS', 1),
+        ]
+        for p in cls._patches:
+            p.start()
+        # Unhandled errors are answered by the app's JSON 500 handler
+        cls._client = TestClient(app_module.app, raise_server_exceptions=False)
+        cls.client = cls._client.__enter__()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._client.__exit__(None, None, None)
+        for p in cls._patches:
+            p.stop()
+        cls._tmp.cleanup()
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def _trust_scores(self, user_id: str) -> dict:
+        """GET ``/trust`` and return its scores keyed by ``(date, metric)``."""
+        resp = self.client.get(f'/trust/{user_id}')
+        self.assertEqual(resp.status_code, 200)
+        return {(s['date'], s['metric']): s['score'] for s in resp.json()['scores']}
+
+    def test_bulk_insert_then_update(self) -> None:
+        """A bulk upsert inserts new rows and updates existing ones in place."""
+        recs = _records('bulk', 8)
+        resp = self.client.post('/records/bulk', json=recs)
+        self.assertEqual(resp.json(), {'count': 8})
+        recs[2]['hrv'] = 99.0
+        resp = self.client.post('/records/bulk', json=recs[:3] + _records('bulk', 10)[8:])
+        self.assertEqual(resp.json(), {'count': 5})
+        stored = self.client.get('/records/bulk').json()
+        self.assertEqual(len(stored), 10)
+        self.assertEqual(stored[2]['hrv'], 99.0)
+        self.assertEqual([r['date'] for r in stored], sorted(r['date'] for r in stored))
+
+    def test_bulk_failure_commits_nothing(self) -> None:
+        """A row failing mid-batch rolls the whole batch back."""
+        self.client.post('/records/bulk', json=_records('atomic', 3))
+        recs = _records('atomic', 6, seed=1)
+        recs[4]['hrv'] = -1.0
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "CREATE TRIGGER reject_negative_hrv BEFORE INSERT ON health_records "
+                "WHEN NEW.hrv < 0 BEGIN SELECT RAISE(ABORT, 'negative hrv'); END;"
+            )
+        try:
+            resp = self.client.post('/records/bulk', json=recs)
+        finally:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute('DROP TRIGGER reject_negative_hrv;')
+        self.assertEqual(resp.status_code, 500)
+        stored = self.client.get('/records/atomic').json()
+        self.assertEqual([r['hrv'] for r in stored], [r['hrv'] for r in _records('atomic', 3)])
+        # The connection is usable again after the rollback
+        self.assertEqual(self.client.post('/records/bulk', json=recs[:4]).json(), {'count': 4})
+
+    def test_bulk_failed_commit_rolls_back(self) -> None:
+        """A commit that fails leaves the shared connection out of the transaction."""
+        recs = _records('busy', 4)
+        busy = sqlite3.OperationalError('database is locked')
+        with mock.patch.object(db._CONN, 'commit', side_effect=busy):
+            resp = self.client.post('/records/bulk', json=recs)
+        self.assertEqual(resp.status_code, 500)
+        self.assertEqual(self.client.get('/records/busy').json(), [])
+        self.assertEqual(self.client.post('/records/bulk', json=recs).json(), {'count': 4})
+
+    def test_trust_cache_invalidated_by_upsert(self) -> None:
+        """An in-place update recomputes trust despite an unchanged summary."""
+        for rec in _records('cached', 10):
+            self.client.post('/records', json=rec)
+        with mock.patch.object(app_module, '_run_compute', wraps=app_module._run_compute) as compute:
+            before = self._trust_scores('cached')
+            self.assertEqual(self._trust_scores('cached'), before)
+            self.assertEqual(compute.call_count, 1)
+            # Same user and date, so the row count and latest date are unchanged
+            update = dict(_records('cached', 10)[-1], hrv=400.0)
+            self.client.post('/records', json=update)
+            after = self._trust_scores('cached')
+            self.assertEqual(compute.call_count, 2)
+        self.assertNotEqual(after, before)
+
+    def test_trust_cache_invalidated_by_bulk_upsert(self) -> None:
+        """A bulk write makes the next /trust call miss the cache."""
+        self.client.post('/records/bulk', json=_records('cached_bulk', 10))
+        with mock.patch.object(app_module, '_run_compute', wraps=app_module._run_compute) as compute:
+            before = self._trust_scores('cached_bulk')
+            recs = _records('cached_bulk', 10)
+            recs[-1]['hrv'] = 400.0
+            self.client.post('/records/bulk', json=recs)
+            after = self._trust_scores('cached_bulk')
+            self.assertEqual(compute.call_count, 2)
+        self.assertNotEqual(after, before)
+
+    def test_simulate_payload_types(self) -> None:
+        """Tampered records keep the HealthRecordOut types in every mode."""
+        recs = _records('sim', 20)
+        recs[5]['steps'] = None
+        self.client.post('/records/bulk', json=recs)
+        for mode in ('missing', 'delay', 'spoof', 'noise'):
+            resp = self.client.post('/simulate', json={'user_id': 'sim', 'mode': mode, 'fraction': 0.5})
+            self.assertEqual(resp.status_code, 200, mode)
+            body = resp.json()
+            self.assertEqual(body['mode'], mode)
+            self.assertEqual(len(body['modified_records']), 20)
+            self.assertEqual(len(body['detected_anomalies']), 20)
+            for rec in body['modified_records']:
+                self.assertIsInstance(rec['id'], int)
+                self.assertTrue(rec['steps'] is None or type(rec['steps']) is int, (mode, rec['steps']))
+                for m in ('sleep_hours', 'resting_hr', 'hrv', 'calories', 'weight'):
+                    self.assertTrue(rec[m] is None or isinstance(rec[m], float), (mode, m, rec[m]))
+            for day in body['detected_anomalies']:
+                self.assertIsInstance(day['is_anomaly'], bool)
+                self.assertIsInstance(day['narrative'], str)
+
+    def test_anomaly_and_correlations(self) -> None:
+        """The anomaly and correlation routes return one entry per day / metric pair."""
+        recs = _records('stats', 20)
+        recs[15]['resting_hr'] = 140.0
+        self.client.post('/records/bulk', json=recs)
+        results = self.client.get('/anomaly/stats').json()['results']
+        self.assertEqual([r['date'] for r in results], [r['date'] for r in recs])
+        self.assertTrue(results[15]['is_anomaly'])
+        self.assertIn('resting_hr', [d['metric'] for d in results[15]['drivers']])
+        corrs = self.client.get('/correlations/stats').json()['correlations']
+        self.assertEqual(len(corrs), 15)
+        for c in corrs:
+            self.assertLessEqual(abs(c['correlation']), 1.0)
+        self.assertEqual(self.client.get('/anomaly/nobody').status_code, 400)
+        self.assertEqual(self.client.get('/correlations/nobody').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+"""Unit tests for the in-process result cache."""
+
+import unittest
+from unittest import mock
+
+from backend import cache
+
+
+class TestResultCache(unittest.TestCase):
+    """Test suite for backend.cache."""
+
+    def tearDown(self) -> None:
+        cache.clear()
+
+    def test_lru_eviction(self) -> None:
+        """The least recently used entry is evicted once the cache is full."""
+        with mock.patch.object(cache, 'MAXSIZE', 2):
+            cache.put('a', 1)
+            cache.put('b', 2)
+            self.assertEqual(cache.get('a'), 1)
+            cache.put('c', 3)
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual(cache.get('a'), 1)
+            self.assertEqual(cache.get('c'), 3)
+
+    def test_ttl_expiry(self) -> None:
+        """Entries older than the TTL are treated as missing."""
+        with mock.patch.object(cache.time, 'monotonic', return_value=100.0):
+            cache.put('a', 1)
+        with mock.patch.object(cache.time, 'monotonic', return_value=100.0 + cache.TTL_SECONDS + 1):
+            self.assertIsNone(cache.get('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+"""Unit tests keeping the msgspec response mirrors in sync with Pydantic."""
+
+import unittest
+
+import msgspec
+
+from backend import fast_schemas, schemas
+
+
+class TestFastSchemas(unittest.TestCase):
+    """Test suite for backend.fast_schemas."""
+
+    def test_fields_mirror_pydantic_models(self) -> None:
+        """Every struct should expose the same fields as its Pydantic model."""
+        for name in ['HealthRecordOut', 'TrustScore', 'TrustScoresOut', 'AnomalyDriver',
+                     'AnomalyOut', 'AnomalyListOut', 'CorrelationEntry', 'CorrelationMatrixOut']:
+            struct = getattr(fast_schemas, name)
+            model = getattr(schemas, name)
+            self.assertEqual(list(struct.__struct_fields__), list(model.model_fields), name)
+
+    def test_encode_validates_payload(self) -> None:
+        """Payloads that do not match the schema are rejected."""
+        entry = {'metric_x': 'hrv', 'metric_y': 'steps', 'correlation': 0.5}
+        body = fast_schemas.encode({'user_id': 'u', 'correlations': [entry]}, fast_schemas.CorrelationMatrixOut)
+        self.assertEqual(msgspec.json.decode(body), {'user_id': 'u', 'correlations': [entry]})
+        with self.assertRaises(msgspec.ValidationError):
+            fast_schemas.encode({'user_id': 'u', 'correlations': [{'metric_x': 'hrv'}]}, fast_schemas.CorrelationMatrixOut)
+
+
+if __name__ == '__main__':
+    unittest.main()
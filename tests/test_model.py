@@ -0,0 +1,94 @@
+"""Unit tests for the functional model used by the FastAPI endpoints.
+
+These mirror the class-based tests in ``test_models.py`` for the
+module-level functions in ``backend.model``, which back the ``/trust``,
+``/anomaly``, ``/correlations`` and ``/simulate`` endpoints.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from backend import db, model
+
+
+class TestModelFunctions(unittest.TestCase):
+    """Test suite for backend.model."""
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(42)
+        dates = pd.date_range('2024-01-01', periods=30, freq='D')
+        self.df = pd.DataFrame({
+            'id': range(1, len(dates) + 1),
+            'user_id': ['test'] * len(dates),
+            'date': dates.strftime('%Y-%m-%d'),
+            'sleep_hours': rng.normal(7, 0.5, len(dates)),
+            'resting_hr': rng.normal(60, 5, len(dates)),
+            'hrv': rng.normal(50, 10, len(dates)),
+            'steps': rng.integers(6000, 10000, len(dates)),
+            'calories': rng.normal(2000, 200, len(dates)),
+            'weight': rng.normal(70, 3, len(dates)),
+        })
+
+    def test_trust_scores(self) -> None:
+        """Scores lie in [0, 1] and missing values get zero trust."""
+        df = self.df.copy()
+        df.loc[3, 'hrv'] = np.nan
+        df_trust, entries = model.compute_trust_scores(df)
+        self.assertEqual(len(entries), len(df) * len(model.METRICS))
+        for e in entries:
+            self.assertGreaterEqual(e['score'], 0.0)
+            self.assertLessEqual(e['score'], 1.0)
+        missing = [e for e in entries if e['date'] == df.loc[3, 'date'] and e['metric'] == 'hrv']
+        self.assertEqual(missing[0]['score'], 0.0)
+        self.assertEqual(missing[0]['drivers'], ['missing'])
+        self.assertEqual(df_trust.loc[3, 'trust_hrv'], 0.0)
+
+    def test_anomaly_drivers_and_narrative(self) -> None:
+        """A spiked metric is reported as the driver of an anomalous day."""
+        df = self.df.copy()
+        df.loc[25, 'resting_hr'] = 120.0
+        results = model.compute_anomalies(df)
+        self.assertEqual(len(results), len(df))
+        day = results[25]
+        self.assertTrue(day['is_anomaly'])
+        self.assertIn('resting_hr', [d['metric'] for d in day['drivers']])
+        self.assertIn('resting hr is above baseline', day['narrative'])
+        self.assertEqual(results[0]['narrative'], f"{df.loc[0, 'date']}: Within normal variation.")
+
+    def test_predictor_weights_match_per_metric_solve(self) -> None:
+        """Weights from the inverse equal the leave-one-out regressions."""
+        C = np.corrcoef(model._metric_matrix(self.df).T)
+        W = model._predictor_weights(C)
+        np.testing.assert_array_equal(np.diag(W), 0.0)
+        for i in range(len(model.METRICS)):
+            others = [j for j in range(len(model.METRICS)) if j != i]
+            expected = np.linalg.solve(C[np.ix_(others, others)], C[others, i])
+            np.testing.assert_allclose(W[i, others], expected)
+
+    def test_predictor_weights_singular_match_lstsq(self) -> None:
+        """Singular correlation matrices fall back to per-metric least squares."""
+        df = self.df.copy()
+        df['resting_hr'] = df['sleep_hours']
+        short = self.df.iloc[:4]
+        for frame in (df, short):
+            C = np.corrcoef(model._metric_matrix(frame).T)
+            W = model._predictor_weights(C)
+            for i in range(len(model.METRICS)):
+                others = [j for j in range(len(model.METRICS)) if j != i]
+                expected = np.linalg.lstsq(C[np.ix_(others, others)], C[others, i], rcond=None)[0]
+                np.testing.assert_allclose(W[i, others], expected, atol=1e-10)
+        W = model._predictor_weights(np.corrcoef(model._metric_matrix(df).T))
+        self.assertAlmostEqual(W[0, 1], 1.0)
+
+    def test_metric_frame_matches_db_columns(self) -> None:
+        """The DB matrix columns and the model metrics share one order."""
+        self.assertEqual(db.METRIC_COLUMNS, tuple(model.METRICS))
+        values = model._metric_matrix(self.df)
+        df = model.metric_frame('test', self.df['date'].tolist(), values)
+        self.assertEqual(list(df.columns), ['user_id', 'date'] + model.METRICS)
+        self.assertEqual(model.compute_correlations(df), model.compute_correlations(self.df))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,7 @@ import unittest
 import numpy as np
 import pandas as pd
 
+from backend.models import trust_engine
 from backend.models.trust_engine import TrustEngine
 from backend.models.anomaly_detector import AnomalyDetector
 
@@ -50,7 +51,8 @@ class TestModels(unittest.TestCase):
         baseline_results = detector.compute_anomalies(self.df.copy())
         baseline_anoms = [r for r in baseline_results if r['is_anomaly']]
         # Apply noise simulation
-        df_noise = detector.simulate_attack(self.df.copy(), mode='noise', fraction=0.3)
+        rng = np.random.default_rng(42)
+        df_noise = detector.simulate_attack(self.df.copy(), mode='noise', fraction=0.3, rng=rng)
         noise_results = detector.compute_anomalies(df_noise)
         noise_anoms = [r for r in noise_results if r['is_anomaly']]
         # We expect at least as many anomalies after noise injection
@@ -58,6 +60,52 @@ class TestModels(unittest.TestCase):
         # There should be at least one anomaly detected in the noisy dataset
         self.assertTrue(any(r['is_anomaly'] for r in noise_results))
 
+    def test_spike_is_reported_as_driver(self) -> None:
+        """A spiked metric should drive an anomaly and its narrative."""
+        detector = AnomalyDetector()
+        df = self.df.copy()
+        df.loc[25, 'resting_hr'] = 120.0
+        day = detector.compute_anomalies(df)[25]
+        self.assertTrue(day['is_anomaly'])
+        self.assertIn('resting_hr', [d['metric'] for d in day['drivers']])
+        self.assertIn('resting hr is above baseline', day['narrative'])
+
+    def test_batch_matches_per_user(self) -> None:
+        """Batched users should give the same results as one call each."""
+        rng = np.random.default_rng(7)
+        dates = pd.date_range('2023-01-01', periods=400, freq='D')
+        dfs = []
+        for u in range(6):
+            df = pd.DataFrame({'user_id': [f'u{u}'] * len(dates), 'date': dates.strftime('%Y-%m-%d')})
+            for m, (mu, sd) in zip(AnomalyDetector().metrics, [(7, 0.5), (60, 5), (50, 10), (8000, 1000), (2000, 200), (70, 3)]):
+                df[m] = rng.normal(mu, sd, len(dates))
+            dfs.append(df)
+        detector, engine = AnomalyDetector(), TrustEngine()
+        self.assertEqual(detector.compute_anomalies_batch(dfs), [detector.compute_anomalies(df) for df in dfs])
+        for (df_trust, entries), df in zip(engine.compute_trust_scores_batch(dfs), dfs):
+            exp_df, exp_entries = engine.compute_trust_scores(df)
+            self.assertEqual(entries, exp_entries)
+            pd.testing.assert_frame_equal(df_trust, exp_df)
+
+    @unittest.skipIf(trust_engine.trust_kernel is None, 'numba is not installed')
+    def test_trust_kernel_matches_numpy(self) -> None:
+        """The JIT trust kernel and the NumPy fallback should agree."""
+        rng = np.random.default_rng(3)
+        vals = rng.normal(0, 1, (60, 4))
+        vals[rng.random(vals.shape) < 0.2] = np.nan
+        meds = rng.normal(0, 0.5, vals.shape)
+        meds[:7] = np.nan
+        mads = rng.uniform(0.1, 1.0, vals.shape)
+        W = rng.normal(0, 0.5, (4, 4))
+        np.fill_diagonal(W, 0.0)
+        W[2, 1] = np.nan
+        scale = rng.uniform(0.5, 2.0, 4)
+        trust, codes = np.empty_like(vals), np.empty(vals.shape, dtype=np.int64)
+        trust_engine.trust_kernel(vals, meds, mads, W, scale, trust, codes)
+        exp_trust, exp_codes = trust_engine._trust_arrays(vals, meds, mads, W, scale)
+        np.testing.assert_allclose(trust, exp_trust, atol=1e-12)
+        np.testing.assert_array_equal(codes, exp_codes)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
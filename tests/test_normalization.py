@@ -0,0 +1,73 @@
+"""Unit tests for the robust baseline utilities.
+
+The rolling median and MAD are computed with strided NumPy windows rather
+than a per‑window Python callback. These tests pin the result to the
+straightforward pandas formulation so the two cannot drift apart.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from backend.data_pipeline import normalization
+from backend.data_pipeline.normalization import build_robust_baseline, _column_mads, _mad
+
+
+class TestRobustBaseline(unittest.TestCase):
+    """Test suite for build_robust_baseline."""
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(7)
+        self.df = pd.DataFrame({
+            'user_id': ['test'] * 40,
+            'date': pd.date_range('2024-01-01', periods=40, freq='D').strftime('%Y-%m-%d'),
+            'hrv': rng.normal(50, 10, 40),
+            'steps': rng.integers(6000, 10000, 40),
+        })
+
+    def test_matches_rolling_apply(self) -> None:
+        """Baselines should equal a shifted pandas rolling median / MAD."""
+        out = build_robust_baseline(self.df, window=14)
+        for m in ['hrv', 'steps']:
+            rolling = self.df[m].astype(float).rolling(window=14, min_periods=7)
+            np.testing.assert_allclose(out[f'{m}_median'], rolling.median().shift(1))
+            np.testing.assert_allclose(out[f'{m}_mad'], rolling.apply(_mad, raw=False).shift(1))
+
+    def test_missing_values_are_ignored(self) -> None:
+        """A missing value inside the window should not collapse the MAD."""
+        df = self.df.copy()
+        df.loc[10, 'hrv'] = np.nan
+        out = build_robust_baseline(df, window=14)
+        expected = _mad(df.loc[6:19, 'hrv'].dropna())
+        self.assertAlmostEqual(out.loc[20, 'hrv_mad'], expected)
+        self.assertGreater(out['hrv_mad'].min(), 1e-3)
+
+    def test_explicit_metrics(self) -> None:
+        """Only the requested metrics should receive baseline columns."""
+        out = build_robust_baseline(self.df, metrics=['hrv'])
+        self.assertIn('hrv_median', out.columns)
+        self.assertNotIn('steps_median', out.columns)
+
+    def test_column_mads_match_mad(self) -> None:
+        """Column MADs should equal _mad of each column without its NaNs."""
+        values = self.df[['hrv', 'steps']].to_numpy(dtype=float)
+        values[::3, 0] = np.nan
+        values = np.column_stack([values, np.full(len(values), np.nan), np.full(len(values), 5.0)])
+        expected = [_mad(pd.Series(col).dropna()) for col in values[:, [0, 1, 3]].T]
+        np.testing.assert_array_equal(_column_mads(values), expected[:2] + [1e-6, expected[2]])
+
+    @unittest.skipIf(normalization.rolling_median_mad is None, 'numba is not installed')
+    def test_numba_kernel_matches_numpy(self) -> None:
+        """The JIT kernel and the NumPy fallback should agree exactly."""
+        rng = np.random.default_rng(3)
+        x = rng.integers(0, 6, (60, 4)).astype(float)
+        x[rng.random(x.shape) < 0.2] = np.nan
+        med, mad = np.empty_like(x), np.empty_like(x)
+        normalization.rolling_median_mad(x, 14, 7, med, mad)
+        exp_med, exp_mad = normalization._lagged_median_mad(x, 14, 7)
+        np.testing.assert_array_equal(med, exp_med)
+        np.testing.assert_array_equal(mad, exp_mad)
+
+
+if __name__ == '__main__':
+    unittest.main()